@@ -1,9 +1,13 @@
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User, Group
 from django.contrib import admin
-from django.utils.safestring import mark_safe
+from django.db import models
+from django.template.loader import render_to_string
 
-from .models import Category, Comment, Location, Post, Comment
+from .forms import UploadImageField
+from .jobs import requeue
+from .models import Category, Comment, Job, Location, Post, Comment
+from .templatetags.post_images import POST_IMAGE_TEMPLATE, post_image
 
 
 @admin.register(Post)
@@ -27,12 +31,17 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('title',)
     list_filter = ('category',)
     readonly_fields = ['post_photo']
+    formfield_overrides = {
+        models.ImageField: {'form_class': UploadImageField},
+    }
 
     @admin.display(description="Изображение")
     def post_photo(self, obj):
-        if obj:
-            return mark_safe(f'<img src={obj.image.url}\
-                            \n width="80" height="60">')
+        if obj.image:
+            return render_to_string(
+                POST_IMAGE_TEMPLATE,
+                post_image(obj, 'admin')
+            )
         return 'Не задано'
 
 
@@ -96,6 +105,33 @@ class Comment(admin.ModelAdmin):
     list_filter = ('text',)
 
 
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'task',
+        'status',
+        'attempts',
+        'run_after',
+        'finished_at',
+    )
+    list_filter = ('status', 'task')
+    readonly_fields = (
+        'attempts',
+        'locked_by',
+        'started_at',
+        'finished_at',
+        'last_error',
+    )
+    actions = ('retry',)
+
+    @admin.action(description='Повторить выбранные задачи')
+    def retry(self, request, queryset):
+        self.message_user(
+            request,
+            f'Поставлено в очередь задач: {requeue(queryset)}.'
+        )
+
+
 admin.site.unregister(User)
 admin.site.unregister(Group)
 admin.site.register(User, UserAdmin)
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+AUTH_USER_KEY = 'blog:auth_user:{}'
+
+
+def get_user_cache():
+    return caches[settings.SESSION_CACHE_ALIAS]
+
+
+def invalidate_cached_user(user_id):
+    get_user_cache().delete(AUTH_USER_KEY.format(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """Достаёт пользователя сессии из кеша, а не из базы."""
+
+    def get_user(self, user_id):
+        key = AUTH_USER_KEY.format(user_id)
+        cache = get_user_cache()
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
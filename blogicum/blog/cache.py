@@ -0,0 +1,159 @@
+import atexit
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils import timezone, translation
+from django.utils.http import urlencode
+from django.utils.safestring import mark_safe
+
+POST_CARD_TEMPLATE = 'includes/post_card.html'
+STATS_KEY = 'blog:stats:{}:{}'
+PAGE_TAG_KEY = 'blog:page_tag:{}'
+GLOBAL_PAGE_TAG = 'global'
+# Параметры запроса, от которых зависит страница в кеше.
+PAGE_CACHE_PARAMS = ('page', 'after', 'before', 'q')
+STATS_FLUSH_INTERVAL = 5
+
+_stats = {'counts': Counter(), 'flushed_at': time.monotonic()}
+_stats_lock = threading.Lock()
+
+
+def record_stats(name, hits=0, misses=0):
+    """Копит счётчики в процессе: в общий кеш они пишутся раз в секунды."""
+    with _stats_lock:
+        _stats['counts'][name, 'hits'] += hits
+        _stats['counts'][name, 'misses'] += misses
+        if time.monotonic() - _stats['flushed_at'] < STATS_FLUSH_INTERVAL:
+            return
+    flush_stats()
+
+
+def flush_stats():
+    with _stats_lock:
+        counts = _stats['counts']
+        _stats['counts'] = Counter()
+        _stats['flushed_at'] = time.monotonic()
+    for (name, kind), amount in counts.items():
+        if amount:
+            key = STATS_KEY.format(name, kind)
+            cache.add(key, 0, None)
+            try:
+                cache.incr(key, amount)
+            except ValueError:
+                cache.set(key, amount, None)
+
+
+# Короткие процессы вроде команд не доживают до сброса.
+atexit.register(flush_stats)
+
+
+def get_stats(name):
+    flush_stats()
+    hits = cache.get(STATS_KEY.format(name, 'hits'), 0)
+    misses = cache.get(STATS_KEY.format(name, 'misses'), 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'ratio': hits / total if total else 0,
+    }
+
+
+def post_card_key(post):
+    """Ключ карточки меняется вместе с любыми данными, которые она выводит."""
+    category, location = post.category, post.location
+    stamp = md5(repr((
+        post.title,
+        post.excerpt,
+        post.pub_date,
+        post.is_published,
+        post.image.name,
+        post.image_variants,
+        post.comment_count,
+        post.author.username,
+        category and (category.title, category.slug, category.is_published),
+        location and (location.name, location.is_published),
+        translation.get_language(),
+        timezone.get_current_timezone_name(),
+    )).encode(), usedforsecurity=False).hexdigest()
+    return f'blog:post_card:{post.pk}:{stamp}'
+
+
+def render_post_cards(posts):
+    keys = [post_card_key(post) for post in posts]
+    cards = cache.get_many(keys)
+    missing = {
+        key: render_to_string(POST_CARD_TEMPLATE, {'post': post})
+        for key, post in zip(keys, posts)
+        if key not in cards
+    }
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+        cards.update(missing)
+    record_stats(
+        'post_card',
+        hits=len(keys) - len(missing),
+        misses=len(missing)
+    )
+    return [mark_safe(cards[key]) for key in keys]
+
+
+def get_page_tag_versions(tags):
+    keys = [PAGE_TAG_KEY.format(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Версия по времени не совпадёт с версиями вытесненного тега.
+            # Такой тег не менялся, поэтому хранится не дольше страниц,
+            # собранных по его версии.
+            cache.add(key, time.time_ns(), settings.PAGE_CACHE_TIMEOUT)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate_page_tags(*tags):
+    # Версия тега заодно хранит время последнего изменения страниц.
+    cache.set_many(
+        {PAGE_TAG_KEY.format(tag): time.time_ns() for tag in tags},
+        None
+    )
+
+
+def post_page_tags(category_slug, username):
+    return ('index', f'category:{category_slug}', f'profile:{username}')
+
+
+def get_page_validators(request, tags, floor=None):
+    """ETag и Last-Modified страницы по версиям её тегов."""
+    versions = get_page_tag_versions(tags)
+    modified = datetime.fromtimestamp(max(versions) / 10 ** 9, timezone.utc)
+    if floor is not None:
+        modified = max(modified, floor)
+    # Страница может содержать {% csrf_token %}, а вход на сайт меняет
+    # секрет CSRF: после повторного входа старая копия не годится.
+    csrf_secret = request.META.get('CSRF_COOKIE')
+    etag = md5(
+        repr((request.user.pk, csrf_secret, versions, floor)).encode(),
+        usedforsecurity=False
+    ).hexdigest()
+    return f'W/"{etag}"', modified
+
+
+def get_page_cache_key(request, tags):
+    # Прочие параметры страницу не меняют и не должны плодить ключи.
+    query = urlencode([
+        (name, request.GET[name])
+        for name in PAGE_CACHE_PARAMS
+        if name in request.GET
+    ])
+    path = md5(
+        f'{request.path}?{query}'.encode(), usedforsecurity=False
+    ).hexdigest()
+    versions = '.'.join(map(str, get_page_tag_versions(tags)))
+    return f'blog:page:{path}:{versions}'
@@ -0,0 +1,450 @@
+import atexit
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .db import apply_sqlite_pragmas
+
+MISSING = object()
+LOCK_SUFFIX = ':lock'
+STATS_KEY = 'tiered_cache:stats:{}'
+STATS_FLUSH_INTERVAL = 5
+LOCK_POLL_INTERVAL = 0.05
+CULL_EVERY = 1000
+
+_local_tiers = {}
+_shared_tiers = {}
+_stats = {}
+_registry_lock = threading.Lock()
+
+
+class KeyLocks:
+    """Блокировки процесса по ключам: живут, пока ключ кто-то ждёт."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.locks = {}
+
+    @contextmanager
+    def __call__(self, key):
+        with self.lock:
+            entry = self.locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self.lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.locks[key]
+
+
+class LocalTier:
+    """LRU-кеш процесса, ограниченный числом записей и их объёмом."""
+
+    def __init__(self, max_bytes, max_entries):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.data = OrderedDict()
+        self.size = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, now):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return None
+            expires, blob = item
+            if expires <= now:
+                self._pop(key)
+                return None
+            self.data.move_to_end(key)
+            return blob
+
+    def set(self, key, blob, expires):
+        with self.lock:
+            self._pop(key)
+            if len(blob) > self.max_bytes:
+                return
+            self.data[key] = (expires, blob)
+            self.size += len(blob)
+            while (
+                self.size > self.max_bytes
+                or len(self.data) > self.max_entries
+            ):
+                _, (_, evicted) = self.data.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self.lock:
+            self._pop(key)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.size = 0
+
+    def _pop(self, key):
+        item = self.data.pop(key, None)
+        if item is not None:
+            self.size -= len(item[1])
+
+
+class SQLiteTier:
+    """Общий для процессов кеш в отдельном файле SQLite.
+
+    Срок хранения expires — время в секундах эпохи, NULL — бессрочно.
+    """
+
+    def __init__(self, path, max_entries):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.local = threading.local()
+        self.writes = 0
+
+    @property
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None
+            )
+            apply_sqlite_pragmas(connection.cursor())
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+            )
+            self.local.connection = connection
+        return connection
+
+    def get(self, key, now):
+        row = self.connection.execute(
+            'SELECT value, expires FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (key, now)
+        ).fetchone()
+        return row
+
+    def get_many(self, keys, now):
+        rows = {}
+        keys = list(keys)
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows.update(
+                (key, (value, expires))
+                for key, value, expires in self.connection.execute(
+                    'SELECT key, value, expires FROM cache WHERE key IN '
+                    f'({", ".join("?" * len(chunk))}) '
+                    'AND (expires IS NULL OR expires > ?)',
+                    (*chunk, now)
+                )
+            )
+        return rows
+
+    def set_many(self, items):
+        with self.connection:
+            self.connection.execute('BEGIN IMMEDIATE')
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, expires) '
+                'VALUES (?, ?, ?)',
+                items
+            )
+        self.writes += len(items)
+        if self.writes >= CULL_EVERY:
+            self.cull()
+
+    def add(self, key, blob, expires, now):
+        cursor = self.connection.execute(
+            'INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, '
+            'expires = excluded.expires '
+            'WHERE cache.expires IS NOT NULL AND cache.expires <= ?',
+            (key, blob, expires, now)
+        )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta, now):
+        with self.connection:
+            self.connection.execute('BEGIN IMMEDIATE')
+            row = self.get(key, now)
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            self.connection.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key)
+            )
+        return value
+
+    def touch(self, key, expires, now):
+        return self.connection.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (expires, key, now)
+        ).rowcount > 0
+
+    def delete_many(self, keys):
+        return self.connection.executemany(
+            'DELETE FROM cache WHERE key = ?', [(key,) for key in keys]
+        ).rowcount > 0
+
+    def clear(self):
+        self.connection.execute('DELETE FROM cache')
+
+    def cull(self):
+        self.writes = 0
+        with self.connection:
+            self.connection.execute('BEGIN IMMEDIATE')
+            self.connection.execute(
+                'DELETE FROM cache WHERE expires <= ?', (time.time(),)
+            )
+            self.connection.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY expires IS NULL, expires LIMIT max(0, '
+                '(SELECT count(*) FROM cache) - ?))',
+                (self.max_entries,)
+            )
+
+
+class TieredCache(BaseCache):
+    """Двухуровневый кеш: LRU процесса перед общим кешем в SQLite.
+
+    Записи в процессе живут не дольше LOCAL_TIMEOUT секунд, поэтому
+    изменения из других процессов становятся видны с этой задержкой.
+    LOCAL_TIMEOUT = 0 отключает уровень процесса. get_or_set() вычисляет
+    отсутствующее значение один раз на все процессы.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        location = str(location)
+        options = params.get('OPTIONS', {})
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.lock_timeout = options.get('LOCK_TIMEOUT', 10)
+        with _registry_lock:
+            self.local = _local_tiers.setdefault(location, LocalTier(
+                options.get('LOCAL_MAX_BYTES', 16 * 1024 * 1024),
+                options.get('LOCAL_MAX_ENTRIES', 10000),
+            )) if self.local_timeout else None
+            self.shared = _shared_tiers.setdefault(
+                location, SQLiteTier(location, self._max_entries)
+            )
+            if location not in _stats:
+                # Короткие процессы вроде команд не доживают до сброса.
+                atexit.register(self.flush_stats)
+            self.stats, self.key_locks = _stats.setdefault(location, (
+                {
+                    'counts': Counter(),
+                    'flushed_at': time.monotonic(),
+                    'lock': threading.Lock(),
+                },
+                KeyLocks(),
+            ))
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _count(self, name, amount=1):
+        with self.stats['lock']:
+            self.stats['counts'][name] += amount
+            if (
+                time.monotonic() - self.stats['flushed_at']
+                <= STATS_FLUSH_INTERVAL
+            ):
+                return
+        self.flush_stats()
+
+    def _remember(self, key, blob, expires, now):
+        if self.local is not None:
+            local_expires = now + self.local_timeout
+            if expires is not None:
+                local_expires = min(local_expires, expires)
+            self.local.set(key, blob, local_expires)
+
+    def _forget(self, key):
+        if self.local is not None:
+            self.local.delete(key)
+
+    def _lookup(self, key, now):
+        if self.local is not None:
+            blob = self.local.get(key, now)
+            if blob is not None:
+                self._count('local_hits')
+                return blob
+        row = self.shared.get(key, now)
+        if row is None:
+            self._count('misses')
+            return None
+        self._count('shared_hits')
+        self._remember(key, *row, now)
+        return row[0]
+
+    def get(self, key, default=None, version=None):
+        blob = self._lookup(self._key(key, version), time.time())
+        return default if blob is None else pickle.loads(blob)
+
+    def get_many(self, keys, version=None):
+        now = time.time()
+        keys = {self._key(key, version): key for key in keys}
+        found = {}
+        if self.local is not None:
+            for key in keys:
+                blob = self.local.get(key, now)
+                if blob is not None:
+                    found[key] = blob
+            self._count('local_hits', len(found))
+        missing = [key for key in keys if key not in found]
+        rows = self.shared.get_many(missing, now) if missing else {}
+        for key, row in rows.items():
+            self._remember(key, *row, now)
+            found[key] = row[0]
+        self._count('shared_hits', len(rows))
+        self._count('misses', len(missing) - len(rows))
+        return {keys[key]: pickle.loads(blob) for key, blob in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        expires = self.get_backend_timeout(timeout)
+        items = [
+            (
+                self._key(key, version),
+                pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                expires,
+            )
+            for key, value in data.items()
+        ]
+        if items:
+            self.shared.set_many(items)
+        for key, blob, _ in items:
+            self._remember(key, blob, expires, now)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = self.get_backend_timeout(timeout)
+        if not self.shared.add(key, blob, expires, now):
+            return False
+        self._remember(key, blob, expires, now)
+        return True
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        self._forget(key)
+        return self.shared.incr(key, delta, time.time())
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        self._forget(key)
+        return self.shared.touch(
+            key, self.get_backend_timeout(timeout), time.time()
+        )
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        return self.shared.get(key, time.time()) is not None
+
+    def delete(self, key, version=None):
+        return self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        for key in keys:
+            self._forget(key)
+        return self.shared.delete_many(keys)
+
+    def clear(self):
+        if self.local is not None:
+            self.local.clear()
+        self.shared.clear()
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """Пока одно вычисление идёт, остальные ждут его результата.
+
+        Если default() вернул None, значение не сохраняется.
+        """
+        value = self.get(key, MISSING, version)
+        if value is not MISSING:
+            return value
+        if not callable(default):
+            self.add(key, default, timeout, version)
+            return self.get(key, default, version)
+        lock_key = self._key(key, version) + LOCK_SUFFIX
+        with self.key_locks(lock_key):
+            value = self.get(key, MISSING, version)
+            if value is not MISSING:
+                self._count('coalesced')
+                return value
+            now = time.time()
+            if self.shared.add(lock_key, b'', now + self.lock_timeout, now):
+                try:
+                    return self._compute(key, default, timeout, version)
+                finally:
+                    self.shared.delete_many([lock_key])
+            while self.shared.get(lock_key, time.time()) is not None:
+                time.sleep(LOCK_POLL_INTERVAL)
+                value = self.get(key, MISSING, version)
+                if value is not MISSING:
+                    self._count('coalesced')
+                    return value
+            return self._compute(key, default, timeout, version)
+
+    def _compute(self, key, default, timeout, version):
+        self._count('computed')
+        value = default()
+        if value is not None:
+            self.set(key, value, timeout, version)
+        return value
+
+    def flush_stats(self):
+        with self.stats['lock']:
+            counts = self.stats['counts']
+            self.stats['counts'] = Counter()
+            self.stats['flushed_at'] = time.monotonic()
+        if self.local is not None:
+            with self.local.lock:
+                counts['evictions'] += self.local.evictions
+                self.local.evictions = 0
+        now = time.time()
+        for name, amount in counts.items():
+            if not amount:
+                continue
+            key = STATS_KEY.format(name)
+            self.shared.add(key, pickle.dumps(0), None, now)
+            self.shared.incr(key, amount, now)
+
+    def get_stats(self):
+        """Счётчики всех процессов и заполненность уровня этого процесса."""
+        self.flush_stats()
+        names = (
+            'local_hits', 'shared_hits', 'misses', 'evictions',
+            'computed', 'coalesced',
+        )
+        rows = self.shared.get_many(
+            [STATS_KEY.format(name) for name in names], time.time()
+        )
+        stats = {
+            name: pickle.loads(rows[STATS_KEY.format(name)][0])
+            if STATS_KEY.format(name) in rows else 0
+            for name in names
+        }
+        if self.local is not None:
+            stats['local_entries'] = len(self.local.data)
+            stats['local_bytes'] = self.local.size
+        return stats
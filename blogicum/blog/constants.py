@@ -1,3 +1,23 @@
 MAX_DISPLAY_POSTS = 10
+MAX_DISPLAY_COMMENTS = 50
 MAX_DISPLAY_HEADING = 20
 CHARFIELD_LENGTH = 256
+EXCERPT_WORDS = 10
+SNIPPET_WORDS = 16
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+# Частое слово совпадает с большей частью публикаций: по релевантности
+# ранжируются только столько самых новых совпадений.
+SEARCH_RANK_WINDOW = 1000
+# Ширина места под изображение в CSS-пикселях и ширины его копий.
+IMAGE_VARIANTS = {
+    'card': (640, (320, 640, 1280)),
+    'detail': (640, (640, 1280, 1920)),
+    'admin': (80, (80, 160)),
+}
+IMAGE_VARIANT_QUALITY = 82
+# Современные форматы в порядке предпочтения и качество сжатия в них.
+IMAGE_FORMAT_QUALITY = {
+    'avif': 60,
+    'webp': 80,
+}
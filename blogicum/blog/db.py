@@ -0,0 +1,8 @@
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(cursor, pragmas=None):
+    if pragmas is None:
+        pragmas = settings.SQLITE_PRAGMAS
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
@@ -1,13 +1,67 @@
 from django import forms
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.forms.models import ModelChoiceIterator
 from django.utils import timezone
 
+from .lookups import get_table
 from .models import Post, Comment
+from .uploads import check_upload, sanitize_upload
 
 
 User = get_user_model()
 
 
+class CachedChoiceIterator(ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for obj in get_table(self.queryset.model).all():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return (
+            len(get_table(self.queryset.model).all())
+            + (self.field.empty_label is not None)
+        )
+
+
+class CachedModelChoiceField(forms.ModelChoiceField):
+    """Варианты выбора берутся из кеша таблицы, а не из базы."""
+
+    iterator = CachedChoiceIterator
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if isinstance(value, self.queryset.model):
+            value = value.pk
+        try:
+            obj = get_table(self.queryset.model).get(int(value))
+        except (TypeError, ValueError):
+            obj = None
+        if obj is None:
+            raise ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+        return obj
+
+
+class UploadImageField(forms.ImageField):
+    """Проверяет изображение по заголовку, не декодируя его целиком."""
+
+    def to_python(self, data):
+        file = forms.FileField.to_python(self, data)
+        if file is None:
+            return None
+        image = check_upload(file)
+        file = sanitize_upload(file, image)
+        file.content_type = image.get_format_mimetype()
+        return file
+
+
 class PostForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -17,6 +71,11 @@ class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         exclude = ('author',)
+        field_classes = {
+            'category': CachedModelChoiceField,
+            'location': CachedModelChoiceField,
+            'image': UploadImageField,
+        }
         widgets = {
             'pub_date': forms.DateTimeInput(
                 format='%Y-%m-%dT%H:%M', attrs={'type': 'datetime-local'}
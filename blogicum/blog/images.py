@@ -0,0 +1,226 @@
+from functools import lru_cache
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+from .constants import (
+    IMAGE_FORMAT_QUALITY,
+    IMAGE_VARIANT_QUALITY,
+    IMAGE_VARIANTS,
+)
+
+VARIANTS_DIR = 'post_images/variants'
+FORMATS_DIR = 'formats'
+FORMAT_TYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+}
+# Значения EXIF Orientation, при которых снимок повёрнут на 90 градусов.
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+@lru_cache(maxsize=None)
+def available_formats():
+    """Форматы из IMAGE_FORMAT_QUALITY, которые умеет кодировать Pillow."""
+    return tuple(fmt for fmt in IMAGE_FORMAT_QUALITY if features.check(fmt))
+
+
+def variant_name(stem, width):
+    return f'{VARIANTS_DIR}/{stem}_{width}.jpg'
+
+
+def alternate_name(name, fmt):
+    """Путь к копии файла name в формате fmt."""
+    return f'{FORMATS_DIR}/{name}.{fmt}'
+
+
+def encode(image, fmt, quality):
+    buffer = BytesIO()
+    options = {'optimize': True, 'progressive': True} if fmt == 'jpeg' else {}
+    image.save(buffer, fmt.upper(), quality=quality, **options)
+    return buffer.getvalue()
+
+
+def replace_file(name, data):
+    """Записывает файл под заданным именем, заменяя прежнюю версию."""
+    # Имена копий выводятся из имени исходника, поэтому их не переименовывают.
+    default_storage.delete(name)
+    return default_storage.save(name, ContentFile(data))
+
+
+def save_alternates(image, name):
+    """Сохраняет image в современных форматах по путям из alternate_name."""
+    for fmt in available_formats():
+        replace_file(
+            alternate_name(name, fmt),
+            encode(image, fmt, IMAGE_FORMAT_QUALITY[fmt])
+        )
+
+
+def to_rgb(image):
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def open_for_resize(file, max_width):
+    """Открывает изображение, сразу уменьшая JPEG при декодировании."""
+    image = Image.open(file)
+    stored_width, stored_height = width, height = image.size
+    if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+        # Файлы, загруженные до проверки размеров, не декодируются.
+        raise ValueError(f'Изображение {width}x{height} слишком большое.')
+    if image.getexif().get(0x0112) in ROTATED_ORIENTATIONS:
+        width, height = height, width
+    if max_width < width:
+        image.draft('RGB', (
+            -(-stored_width * max_width // width),
+            -(-stored_height * max_width // width),
+        ))
+    image = to_rgb(ImageOps.exif_transpose(image))
+    return image, width, height
+
+
+def save_original_alternates(field):
+    """Кодирует оригинал в современные форматы; анимацию не трогает."""
+    with field.open('rb') as file:
+        image = Image.open(file)
+        if getattr(image, 'is_animated', False):
+            return []
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (
+            image.mode == 'P' and 'transparency' in image.info
+        )
+        save_alternates(
+            image.convert('RGBA' if has_alpha else 'RGB'), field.name
+        )
+    return list(available_formats())
+
+
+def build_variants(field):
+    """Сохраняет уменьшенные копии изображения и возвращает их описание."""
+    max_width = max(
+        width for _, widths in IMAGE_VARIANTS.values() for width in widths
+    )
+    with field.open('rb') as file:
+        image, width, height = open_for_resize(file, max_width)
+    stem = PurePosixPath(field.name).stem
+    variants = {
+        'source': field.name,
+        'width': width,
+        'height': height,
+        'formats': list(available_formats()),
+        'source_formats': save_original_alternates(field),
+    }
+    saved = {}
+    for kind, (_, widths) in IMAGE_VARIANTS.items():
+        entries = []
+        for variant_width in sorted(widths):
+            if variant_width >= width and entries:
+                break
+            variant_width = min(variant_width, width)
+            if variant_width not in saved:
+                variant_height = max(1, round(height * variant_width / width))
+                resized = image.resize(
+                    (variant_width, variant_height), Image.LANCZOS
+                )
+                name = replace_file(
+                    variant_name(stem, variant_width),
+                    encode(resized, 'jpeg', IMAGE_VARIANT_QUALITY)
+                )
+                save_alternates(resized, name)
+                saved[variant_width] = {
+                    'name': name,
+                    'width': variant_width,
+                    'height': variant_height,
+                }
+            entries.append(saved[variant_width])
+        variants[kind] = entries
+    return variants
+
+
+def variant_files(variants):
+    """Все файлы, созданные для изображения, кроме самого оригинала."""
+    names = {
+        entry['name']
+        for kind in IMAGE_VARIANTS
+        for entry in variants.get(kind, ())
+    }
+    return names | {
+        alternate_name(name, fmt)
+        for name in names
+        for fmt in variants.get('formats', ())
+    } | {
+        alternate_name(variants['source'], fmt)
+        for fmt in variants.get('source_formats', ())
+    }
+
+
+def delete_variants(variants, keep=()):
+    for name in variant_files(variants) - set(keep):
+        default_storage.delete(name)
+
+
+def variants_are_stale(post):
+    return post.image_variants.get('source') != (post.image.name or None)
+
+
+def pending_variants(field):
+    """Описание копий, которые ещё готовятся в фоне."""
+    return {'source': field.name, 'pending': True} if field else {}
+
+
+def refresh_variants(post):
+    """Пересобирает копии изображения публикации."""
+    old = post.image_variants
+    post.image_variants = build_variants(post.image) if post.image else {}
+    type(post).objects.filter(pk=post.pk).update(
+        image_variants=post.image_variants
+    )
+    delete_variants(old, keep=variant_files(post.image_variants))
+
+
+def entry_url(entry, fmt=None):
+    name = entry['name']
+    return default_storage.url(alternate_name(name, fmt) if fmt else name)
+
+
+def image_context(post, kind, lazy=True):
+    """Атрибуты тегов picture и img для вывода изображения публикации."""
+    display_width = IMAGE_VARIANTS[kind][0]
+    context = {
+        'src': post.image.url,
+        'lazy': lazy,
+        'sizes': f'(max-width: {display_width}px) 100vw, {display_width}px',
+    }
+    if variants_are_stale(post):
+        return context
+    entries = post.image_variants.get(kind) or ()
+    fitting = [entry for entry in entries if entry['width'] <= display_width]
+    main = fitting[-1] if fitting else entries[0] if entries else None
+    if main is None:
+        return context
+
+    def srcset(fmt=None):
+        return ', '.join(
+            f"{entry_url(entry, fmt)} {entry['width']}w" for entry in entries
+        )
+
+    context.update(
+        src=default_storage.url(main['name']),
+        width=main['width'],
+        height=main['height'],
+        srcset=srcset(),
+        sources=[
+            {'type': FORMAT_TYPES[fmt], 'srcset': srcset(fmt)}
+            for fmt in post.image_variants.get('formats', ())
+        ],
+    )
+    return context
@@ -0,0 +1,147 @@
+import traceback
+from datetime import timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+Status = Job.Status
+ERROR_LENGTH = 4000
+
+
+def enqueue(task, **payload):
+    """Ставит задачу в очередь в текущей транзакции."""
+    return Job.objects.create(task=task, payload=payload)
+
+
+def claim(worker, limit):
+    """Забирает до limit готовых к выполнению задач для одного обработчика."""
+    now = timezone.now()
+    token = f'{worker}:{uuid4().hex}'
+    ready = Job.objects.filter(
+        status=Status.PENDING,
+        run_after__lte=now
+    ).order_by('run_after', 'pk').values('pk')[:limit]
+    claimed = Job.objects.filter(
+        pk__in=ready,
+        status=Status.PENDING
+    ).update(
+        status=Status.RUNNING,
+        locked_by=token,
+        started_at=now,
+        attempts=F('attempts') + 1
+    )
+    if not claimed:
+        return []
+    return list(Job.objects.filter(locked_by=token, status=Status.RUNNING))
+
+
+def retry_at(attempts, now):
+    delay = settings.JOB_RETRY_DELAY * 2 ** (attempts - 1)
+    return now + timedelta(seconds=delay)
+
+
+def run_job(job):
+    """Выполняет задачу и возвращает её новое состояние."""
+    try:
+        import_string(job.task)(**job.payload)
+    except Exception:
+        return fail(job, traceback.format_exc())
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+        status=Status.DONE,
+        finished_at=timezone.now(),
+        last_error=''
+    )
+    return Status.DONE
+
+
+def fail(job, error):
+    now = timezone.now()
+    if job.attempts >= settings.JOB_MAX_ATTEMPTS:
+        changes = {'status': Status.DEAD, 'finished_at': now}
+    else:
+        changes = {
+            'status': Status.PENDING,
+            'run_after': retry_at(job.attempts, now),
+        }
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+        locked_by='',
+        last_error=error[-ERROR_LENGTH:],
+        **changes
+    )
+    return changes['status']
+
+
+def release_stale():
+    """Возвращает в очередь задачи обработчиков, которые перестали отвечать."""
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Status.RUNNING,
+        started_at__lt=now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    )
+    error = 'Обработчик не завершил задачу вовремя.'
+    dead = stale.filter(attempts__gte=settings.JOB_MAX_ATTEMPTS).update(
+        status=Status.DEAD,
+        locked_by='',
+        finished_at=now,
+        last_error=error
+    )
+    return dead + stale.update(
+        status=Status.PENDING,
+        locked_by='',
+        run_after=now,
+        last_error=error
+    )
+
+
+def purge_finished():
+    return Job.objects.filter(
+        status=Status.DONE,
+        finished_at__lt=timezone.now() - timedelta(
+            seconds=settings.JOB_KEEP_FINISHED
+        )
+    ).delete()[0]
+
+
+def requeue(queryset):
+    return queryset.exclude(status=Status.RUNNING).update(
+        status=Status.PENDING,
+        attempts=0,
+        run_after=timezone.now(),
+        finished_at=None
+    )
+
+
+def job_stats(period=timedelta(hours=1)):
+    """Размер очереди и пропускная способность за последний период."""
+    now = timezone.now()
+    counts = dict(
+        Job.objects.order_by().values_list('status').annotate(Count('pk'))
+    )
+    finished = Job.objects.filter(
+        status=Status.DONE,
+        finished_at__gte=now - period
+    ).aggregate(
+        done=Count('pk'),
+        duration=Avg(ExpressionWrapper(
+            F('finished_at') - F('started_at'),
+            output_field=DurationField()
+        ))
+    )
+    oldest = Job.objects.filter(
+        status=Status.PENDING,
+        run_after__lte=now
+    ).order_by('run_after').values_list('run_after', flat=True).first()
+    return {
+        **{status: counts.get(status, 0) for status in Status.values},
+        'throughput': finished['done'] / period.total_seconds(),
+        'duration': (
+            finished['duration'].total_seconds()
+            if finished['duration'] else 0
+        ),
+        'wait': (now - oldest).total_seconds() if oldest else 0,
+    }
@@ -0,0 +1,71 @@
+import threading
+import time
+
+from django.apps import apps
+from django.core.cache import cache
+
+VERSION_KEY = 'blog:lookup_version:{}'
+
+
+class TableCache:
+    """Копия небольшой таблицы в памяти процесса.
+
+    Процессы сверяют копию с общим номером версии в кеше и перечитывают
+    таблицу, только когда он изменился. Изменения через update() и
+    bulk_create() сигналов не вызывают, после них нужен invalidate().
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self.version = None
+        self.data = ((), {})
+        self.lock = threading.Lock()
+
+    @property
+    def version_key(self):
+        return VERSION_KEY.format(self.label)
+
+    def get_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, time.time_ns(), None)
+            version = cache.get(self.version_key)
+        return version
+
+    def load(self):
+        version = self.get_version()
+        if version is None or version != self.version:
+            with self.lock:
+                rows = tuple(apps.get_model(self.label).objects.all())
+                self.data = (rows, {row.pk: row for row in rows})
+                self.version = version
+        return self.data
+
+    def invalidate(self):
+        cache.set(self.version_key, time.time_ns(), None)
+
+    def all(self):
+        return self.load()[0]
+
+    def as_dict(self):
+        return self.load()[1]
+
+    def get(self, pk):
+        return self.as_dict().get(pk)
+
+    def find(self, **attrs):
+        for row in self.all():
+            if all(
+                getattr(row, name) == value for name, value in attrs.items()
+            ):
+                return row
+        return None
+
+
+categories = TableCache('blog.Category')
+locations = TableCache('blog.Location')
+TABLES = {table.label: table for table in (categories, locations)}
+
+
+def get_table(model):
+    return TABLES[model._meta.label]
@@ -0,0 +1,110 @@
+import random
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageDraw, ImageFilter
+
+from blog.constants import (
+    IMAGE_FORMAT_QUALITY,
+    IMAGE_VARIANT_QUALITY,
+    IMAGE_VARIANTS,
+)
+from blog.images import available_formats, encode, open_for_resize
+
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает размер и время кодирования копий изображений '
+        'в JPEG и современных форматах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            type=Path,
+            default=Path(settings.MEDIA_ROOT) / 'post_images',
+            help='Каталог с изображениями для замера.'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=20,
+            help='Сколько изображений взять из каталога.'
+        )
+        parser.add_argument(
+            '--width', type=int, default=IMAGE_VARIANTS['card'][0],
+            help='Ширина копий в пикселях.'
+        )
+
+    def handle(self, *args, **options):
+        images = self.load(options)
+        self.stdout.write(
+            f'Изображений: {len(images)}, ширина копий {options["width"]} px.'
+        )
+        qualities = {'jpeg': IMAGE_VARIANT_QUALITY}
+        qualities.update(
+            (fmt, IMAGE_FORMAT_QUALITY[fmt]) for fmt in available_formats()
+        )
+        results = {}
+        for fmt, quality in qualities.items():
+            size = elapsed = 0
+            for image in images:
+                started = time.perf_counter()
+                size += len(encode(image, fmt, quality))
+                elapsed += time.perf_counter() - started
+            results[fmt] = (size, elapsed)
+        baseline = results['jpeg'][0]
+        for fmt, (size, elapsed) in results.items():
+            self.stdout.write(
+                f'{fmt.upper()} (качество {qualities[fmt]}): '
+                f'{size / 1024:.0f} КБ, '
+                f'экономия {1 - size / baseline:.1%} от JPEG, '
+                f'{elapsed / len(images) * 1000:.0f} мс на изображение'
+            )
+
+    def load(self, options):
+        paths = sorted(
+            path for path in options['source'].glob('*')
+            if path.suffix.lower() in IMAGE_SUFFIXES
+        )[:options['limit']]
+        if not paths:
+            self.stdout.write('Изображений не найдено, беру синтетические.')
+            return [
+                self.resize(self.synthetic(seed), options['width'])
+                for seed in range(options['limit'])
+            ]
+        images = []
+        for path in paths:
+            with path.open('rb') as file:
+                image, width, height = open_for_resize(file, options['width'])
+            images.append(self.resize(image, options['width']))
+        return images
+
+    def resize(self, image, width):
+        width = min(width, image.width)
+        return image.resize(
+            (width, max(1, round(image.height * width / image.width))),
+            Image.LANCZOS
+        )
+
+    def synthetic(self, seed):
+        """Снимок-заменитель: плавный фон, фигуры и немного шума."""
+        rnd = random.Random(seed)
+        image = Image.linear_gradient('L').resize((1600, 1200)).convert('RGB')
+        image = Image.merge('RGB', [
+            channel.point(lambda value, k=rnd.random(): int(value * k))
+            for channel in image.split()
+        ])
+        draw = ImageDraw.Draw(image)
+        for _ in range(40):
+            x, y = rnd.randrange(1600), rnd.randrange(1200)
+            radius = rnd.randrange(20, 300)
+            draw.ellipse(
+                (x - radius, y - radius, x + radius, y + radius),
+                fill=tuple(rnd.randrange(256) for _ in range(3))
+            )
+        image = image.filter(ImageFilter.GaussianBlur(3))
+        noise = Image.effect_noise(image.size, 20).convert('RGB')
+        return Image.blend(image, noise, 0.1)
@@ -0,0 +1,97 @@
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.views.static import serve
+
+from blog.media import serve_media
+
+FILE_NAME = 'post_images/large.jpg'
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет скорость отдачи большого изображения: целиком, '
+        'по диапазонам, при повторной проверке и через прокси.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size', type=int, default=50,
+            help='Размер файла в мегабайтах.'
+        )
+        parser.add_argument('--requests', type=int, default=20)
+        parser.add_argument(
+            '--range-size', type=int, default=1024 * 1024,
+            help='Размер запрашиваемого диапазона в байтах.'
+        )
+
+    def handle(self, *args, **options):
+        size = options['size'] * 1024 * 1024
+        with tempfile.TemporaryDirectory() as media_root:
+            path = Path(media_root) / FILE_NAME
+            path.parent.mkdir(parents=True)
+            with path.open('wb') as file:
+                for _ in range(options['size']):
+                    file.write(os.urandom(1024 * 1024))
+            with override_settings(
+                MEDIA_ROOT=media_root, MEDIA_SENDFILE_HEADER=None
+            ):
+                self.run(media_root, size, options)
+
+    def run(self, media_root, size, options):
+        factory = RequestFactory()
+        count = options['requests']
+
+        def media(**headers):
+            return serve_media(factory.get('/', **headers), FILE_NAME)
+
+        def static():
+            return serve(
+                factory.get('/'), FILE_NAME, document_root=media_root
+            )
+
+        etag = media()['ETag']
+        self.report('django.views.static.serve', static, count, size)
+        self.report('serve_media, файл целиком', media, count, size)
+        range_size = options['range_size']
+        self.report(
+            f'serve_media, диапазоны по {range_size // 1024} КБ',
+            lambda: media(HTTP_RANGE=self.random_range(size, range_size)),
+            count * 10,
+            range_size
+        )
+        self.report(
+            'serve_media, ответ 304',
+            lambda: media(HTTP_IF_NONE_MATCH=etag),
+            count * 100,
+            0
+        )
+        with override_settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect'):
+            self.report('serve_media, X-Accel-Redirect', media, count * 100, 0)
+
+    def random_range(self, size, range_size):
+        first = random.randrange(size - range_size)
+        return f'bytes={first}-{first + range_size - 1}'
+
+    def report(self, title, request, count, size):
+        tracemalloc.start()
+        started = time.perf_counter()
+        sent = 0
+        for _ in range(count):
+            response = request()
+            for chunk in response:
+                sent += len(chunk)
+            response.close()
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        line = f'{title}: {count / elapsed:.0f} запросов/с'
+        if size:
+            line += f', {sent / elapsed / 1024 / 1024:.0f} МБ/с'
+        self.stdout.write(f'{line}, пик памяти {peak / 1024:.0f} КБ')
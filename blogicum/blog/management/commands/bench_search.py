@@ -0,0 +1,139 @@
+import random
+from itertools import accumulate
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from blog.constants import SEARCH_RANK_WINDOW
+
+SYLLABLES = (
+    'ка', 'ро', 'ми', 'ле', 'ту', 'на', 'зо', 'ви', 'ды', 'ше', 'бра', 'сто',
+    'гор', 'пел', 'ян', 'ус', 'ом', 'ре', 'жи', 'фа',
+)
+VOCABULARY_SIZE = 20000
+# Не составляется из SYLLABLES: LIKE для него просматривает всю таблицу.
+ABSENT_WORD = 'нетслова'
+SCHEMA = (
+    'CREATE TABLE post (id INTEGER PRIMARY KEY, title TEXT, text TEXT)',
+    "CREATE VIRTUAL TABLE post_fts USING fts5(title, text, content='post', "
+    "content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+)
+LIKE_QUERY = (
+    'SELECT id FROM post WHERE title LIKE ? OR text LIKE ? '
+    'ORDER BY id LIMIT 10'
+)
+FTS_QUERY = (
+    'SELECT rowid, rank FROM post_fts WHERE post_fts MATCH ?1 '
+    'ORDER BY rank, rowid LIMIT 10'
+)
+# bm25 только для SEARCH_RANK_WINDOW новых совпадений, остальные за ними
+# от новых к старым, как в PostQuerySet.search.
+WINDOW_QUERY = (
+    'SELECT rowid, CASE WHEN rowid >= coalesce((SELECT rowid FROM post_fts '
+    'WHERE post_fts MATCH ?1 ORDER BY rowid DESC LIMIT 1 OFFSET ?2), 0) '
+    'THEN rank ELSE 0.0 END AS window_rank '
+    'FROM post_fts WHERE post_fts MATCH ?1 {} '
+    'ORDER BY window_rank, rowid DESC LIMIT 10'
+)
+# Следующая страница по курсору (rank, id), как в SearchCursorPaginator.
+CURSOR = (
+    'AND (window_rank > ?3 OR (window_rank = ?3 AND rowid < ?4))'
+)
+FTS_COUNT_QUERY = 'SELECT count(*) FROM post_fts WHERE post_fts MATCH ?'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск по публикациям через LIKE и через индекс FTS5 '
+        'на временной базе данных.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--words', type=int, default=200)
+        parser.add_argument('--queries', type=int, default=20)
+
+    def handle(self, *args, **options):
+        vocabulary = sorted({
+            ''.join(random.choices(SYLLABLES, k=random.randint(2, 4)))
+            for _ in range(VOCABULARY_SIZE)
+        })
+        random.shuffle(vocabulary)
+        # Частоты слов в тексте убывают по закону Ципфа.
+        cum_weights = list(accumulate(
+            1 / rank for rank in range(1, len(vocabulary) + 1)
+        ))
+        with tempfile.TemporaryDirectory() as tmp:
+            connection = sqlite3.connect(Path(tmp) / 'bench.sqlite3')
+            self.fill(connection, vocabulary, cum_weights, options)
+            for term in (
+                vocabulary[0], vocabulary[10], vocabulary[100],
+                vocabulary[1000], vocabulary[-1], ABSENT_WORD,
+            ):
+                like = self.measure(
+                    connection, LIKE_QUERY, (f'%{term}%', f'%{term}%'),
+                    options['queries']
+                )
+                match = f'"{term}"'
+                window = SEARCH_RANK_WINDOW - 1
+                fts = self.measure(
+                    connection, FTS_QUERY, (match,), options['queries']
+                )
+                windowed = WINDOW_QUERY.format('')
+                first = self.measure(
+                    connection, windowed, (match, window), options['queries']
+                )
+                count = connection.execute(
+                    FTS_COUNT_QUERY, (match,)
+                ).fetchone()[0]
+                line = (
+                    f'«{term}» ({count} совпадений): LIKE {like:.2f} мс, '
+                    f'FTS5 по всем совпадениям {fts:.2f} мс, '
+                    f'FTS5 с окном {first:.2f} мс'
+                )
+                page = connection.execute(windowed, (match, window)).fetchall()
+                if page:
+                    rowid, rank = page[-1]
+                    cursor = self.measure(
+                        connection, WINDOW_QUERY.format(CURSOR),
+                        (match, window, rank, rowid), options['queries']
+                    )
+                    line += f', следующая страница {cursor:.2f} мс'
+                self.stdout.write(line)
+            connection.close()
+
+    def fill(self, connection, vocabulary, cum_weights, options):
+        for statement in SCHEMA:
+            connection.execute(statement)
+        rows = (
+            (
+                ' '.join(random.choices(
+                    vocabulary, cum_weights=cum_weights, k=5
+                )),
+                ' '.join(random.choices(
+                    vocabulary, cum_weights=cum_weights, k=options['words']
+                )),
+            )
+            for _ in range(options['posts'])
+        )
+        started = time.perf_counter()
+        with connection:
+            connection.executemany(
+                'INSERT INTO post (title, text) VALUES (?, ?)', rows
+            )
+            connection.execute(
+                "INSERT INTO post_fts (post_fts) VALUES ('rebuild')"
+            )
+        self.stdout.write(
+            f'Создано публикаций: {options["posts"]} '
+            f'за {time.perf_counter() - started:.1f} с'
+        )
+
+    def measure(self, connection, query, params, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            connection.execute(query, params).fetchall()
+        return (time.perf_counter() - started) * 1000 / repeat
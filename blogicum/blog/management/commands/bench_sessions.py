@@ -0,0 +1,69 @@
+from uuid import uuid4
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import User
+
+CONFIGURATIONS = (
+    ('Сессия и пользователь из базы', {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'SESSION_SAVE_EVERY_REQUEST': False,
+        'AUTHENTICATION_BACKENDS': [
+            'django.contrib.auth.backends.ModelBackend'
+        ],
+    }),
+    ('Сессия и пользователь из кеша', {}),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает число запросов к базе на страницу авторизованного '
+        'пользователя при сессиях в базе и в кеше. Данные не сохраняются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username=f'bench_{uuid4().hex[:8]}'
+            )
+            urls = ('/', f'/profile/{user.username}/', '/posts/create/')
+            for title, overrides in CONFIGURATIONS:
+                with override_settings(ALLOWED_HOSTS=['*'], **overrides):
+                    total, auth, writes = self.measure(
+                        user, urls, options['requests']
+                    )
+                self.stdout.write(
+                    f'{title}: {total:.2f} запросов на страницу, из них '
+                    f'сессия и пользователь — {auth:.2f}, запись сессии — '
+                    f'{writes:.2f}.'
+                )
+            transaction.set_rollback(True)
+
+    def measure(self, user, urls, requests):
+        client = Client()
+        client.force_login(user)
+        client.get(urls[0])
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(requests):
+                for url in urls:
+                    client.get(url)
+        client.logout()
+        pages = requests * len(urls)
+        queries = [query['sql'] for query in ctx.captured_queries]
+        auth = [
+            sql for sql in queries
+            if 'django_session' in sql
+            or 'WHERE "auth_user"."id" =' in sql
+        ]
+        writes = [
+            sql for sql in auth
+            if not sql.startswith('SELECT')
+        ]
+        return len(queries) / pages, len(auth) / pages, len(writes) / pages
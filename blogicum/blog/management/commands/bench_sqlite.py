@@ -0,0 +1,126 @@
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.db import apply_sqlite_pragmas
+
+SCHEMA = (
+    'CREATE TABLE post ('
+    'id INTEGER PRIMARY KEY, pub_date TEXT, title TEXT, excerpt TEXT, '
+    'comment_count INTEGER DEFAULT 0)',
+    'CREATE INDEX post_pub_date_idx ON post (pub_date)',
+    'CREATE TABLE comment ('
+    'id INTEGER PRIMARY KEY, post_id INTEGER, text TEXT, created_at TEXT)',
+)
+FEED_QUERY = (
+    'SELECT id, title, excerpt, comment_count FROM post '
+    'ORDER BY pub_date DESC LIMIT 10'
+)
+INSERT_COMMENT = (
+    'INSERT INTO comment (post_id, text, created_at) '
+    "VALUES (?, 'Комментарий', datetime('now'))"
+)
+INCREMENT_COMMENT_COUNT = (
+    'UPDATE post SET comment_count = comment_count + 1 WHERE id = ?'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность чтения ленты SQLite '
+        'в режимах DELETE и WAL, пока другой поток добавляет комментарии.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--posts', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        self.pragmas = {
+            name: value for name, value in settings.SQLITE_PRAGMAS.items()
+            if name != 'journal_mode'
+        }
+        seconds = options['seconds']
+        for journal_mode in ('DELETE', 'WAL'):
+            self.stats = {'reads': 0, 'writes': 0, 'busy': 0}
+            self.lock = threading.Lock()
+            self.deadline = time.monotonic() + seconds
+            with tempfile.TemporaryDirectory() as tmp:
+                self.path = Path(tmp) / 'bench.sqlite3'
+                self.create_database(journal_mode, options['posts'])
+                self.run_threads(options['readers'])
+            self.stdout.write(
+                f'{journal_mode}: '
+                f'чтений/с {self.stats["reads"] / seconds:.0f}, '
+                f'комментариев/с {self.stats["writes"] / seconds:.0f}, '
+                f'ошибок блокировки {self.stats["busy"]}'
+            )
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, isolation_level=None)
+        apply_sqlite_pragmas(connection, self.pragmas)
+        return connection
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def create_database(self, journal_mode, posts):
+        connection = self.connect()
+        connection.execute(f'PRAGMA journal_mode = {journal_mode}')
+        for statement in SCHEMA:
+            connection.execute(statement)
+        connection.execute('BEGIN')
+        connection.executemany(
+            'INSERT INTO post (pub_date, title, excerpt) VALUES (?, ?, ?)',
+            (
+                (f'2024-01-01 {i:010d}', f'Пост {i}', 'Текст …')
+                for i in range(posts)
+            )
+        )
+        connection.execute('COMMIT')
+        connection.close()
+
+    def read(self):
+        connection = self.connect()
+        while time.monotonic() < self.deadline:
+            try:
+                connection.execute(FEED_QUERY).fetchall()
+                self.count('reads')
+            except sqlite3.OperationalError:
+                self.count('busy')
+        connection.close()
+
+    def write(self):
+        connection = self.connect()
+        last_post_id = connection.execute(
+            'SELECT max(id) FROM post'
+        ).fetchone()[0]
+        while time.monotonic() < self.deadline:
+            post_id = self.stats['writes'] % last_post_id + 1
+            try:
+                connection.execute('BEGIN IMMEDIATE')
+                connection.execute(INSERT_COMMENT, (post_id,))
+                connection.execute(INCREMENT_COMMENT_COUNT, (post_id,))
+                connection.execute('COMMIT')
+                self.count('writes')
+            except sqlite3.OperationalError:
+                if connection.in_transaction:
+                    connection.execute('ROLLBACK')
+                self.count('busy')
+        connection.close()
+
+    def run_threads(self, readers):
+        threads = [threading.Thread(target=self.write)] + [
+            threading.Thread(target=self.read) for _ in range(readers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
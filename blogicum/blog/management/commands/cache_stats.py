@@ -0,0 +1,32 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from blog.cache import get_stats
+
+CACHED_FRAGMENTS = {
+    'post_card': 'Карточки публикаций',
+    'page': 'Страницы для гостей',
+}
+
+
+class Command(BaseCommand):
+    help = 'Выводит статистику попаданий в кеш.'
+
+    def handle(self, *args, **options):
+        for name, title in CACHED_FRAGMENTS.items():
+            stats = get_stats(name)
+            self.stdout.write(
+                f'{title}: попаданий {stats["hits"]}, '
+                f'промахов {stats["misses"]}, '
+                f'доля попаданий {stats["ratio"]:.1%}'
+            )
+        if hasattr(cache, 'get_stats'):
+            stats = cache.get_stats()
+            self.stdout.write(
+                f'Кеш: попаданий в процессе {stats["local_hits"]}, '
+                f'в общем кеше {stats["shared_hits"]}, '
+                f'промахов {stats["misses"]}, '
+                f'вытеснено из процесса {stats["evictions"]}, '
+                f'пересчётов {stats["computed"]}, '
+                f'ожиданий чужого пересчёта {stats["coalesced"]}'
+            )
@@ -0,0 +1,107 @@
+import posixpath
+import re
+import time
+from collections import Counter
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.images import FORMATS_DIR, VARIANTS_DIR
+from blog.models import MediaFile, Post
+
+UPLOAD_DIRS = ('post_images', FORMATS_DIR)
+DELETE_BATCH_SIZE = 500
+# Копия: <stem>_<ширина>.jpg, возможно с суффиксом, который добавляет Django.
+VARIANT_NAME = re.compile(r'^(?P<stem>.+)_\d+(_[a-zA-Z0-9]{7})?\.jpg$')
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет загруженные изображения и их копии, на которые не ссылается '
+        'ни одна публикация, и сверяет счётчики ссылок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, что будет удалено.'
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=60 * 60,
+            help='Не трогать файлы моложе стольких секунд.'
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        references = Counter(
+            Post.objects.exclude(image='').values_list(
+                'image', flat=True
+            ).order_by().iterator(chunk_size=options['chunk_size'])
+        )
+        stems = {
+            posixpath.splitext(posixpath.basename(name))[0]
+            for name in references
+        }
+        fixed = self.fix_references(references, options['dry_run'])
+        oldest = time.time() - options['min_age']
+        checked = removed = freed = 0
+        for name in self.walk(UPLOAD_DIRS):
+            checked += 1
+            if self.is_referenced(name, references, stems):
+                continue
+            if default_storage.get_modified_time(name).timestamp() > oldest:
+                continue
+            removed += 1
+            freed += default_storage.size(name)
+            if options['verbosity'] > 1:
+                self.stdout.write(name)
+            if not options['dry_run']:
+                default_storage.delete(name)
+        action = 'К удалению' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено файлов: {checked}. {action}: {removed} '
+            f'({freed / 1024 / 1024:.1f} МБ). '
+            f'Исправлено счётчиков ссылок: {fixed}.'
+        ))
+
+    def walk(self, directories):
+        for directory in directories:
+            if not default_storage.exists(directory):
+                continue
+            subdirectories, files = default_storage.listdir(directory)
+            for name in files:
+                yield posixpath.join(directory, name)
+            yield from self.walk(
+                posixpath.join(directory, name) for name in subdirectories
+            )
+
+    def is_referenced(self, name, references, stems):
+        if name.startswith(f'{FORMATS_DIR}/'):
+            name = posixpath.splitext(name[len(FORMATS_DIR) + 1:])[0]
+        if name.startswith(f'{VARIANTS_DIR}/'):
+            match = VARIANT_NAME.match(posixpath.basename(name))
+            return bool(match) and match['stem'] in stems
+        return name in references
+
+    def fix_references(self, references, dry_run):
+        """Приводит MediaFile в соответствие с таблицей публикаций."""
+        stored = dict(MediaFile.objects.values_list('name', 'references'))
+        wrong = {
+            name: count for name, count in references.items()
+            if stored.get(name) != count
+        }
+        missing = sorted(set(stored) - set(references))
+        if dry_run or not (wrong or missing):
+            return len(wrong) + len(missing)
+        with transaction.atomic():
+            for start in range(0, len(missing), DELETE_BATCH_SIZE):
+                MediaFile.objects.filter(
+                    name__in=missing[start:start + DELETE_BATCH_SIZE]
+                ).delete()
+            for name, count in wrong.items():
+                MediaFile.objects.update_or_create(
+                    name=name, defaults={'references': count}
+                )
+        return len(wrong) + len(missing)
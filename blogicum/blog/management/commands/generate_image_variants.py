@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from blog.cache import invalidate_page_tags
+from blog.images import refresh_variants, variants_are_stale
+from blog.models import Post
+from blog.signals import get_post_page_tags
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт уменьшенные копии изображений публикаций, '
+        'у которых их ещё нет или они устарели.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать копии у всех публикаций с изображением.'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').only(
+            'pk', 'image', 'image_variants'
+        )
+        total = posts.count()
+        done = failed = 0
+        for number, post in enumerate(posts.iterator(), 1):
+            if not options['force'] and not variants_are_stale(post):
+                continue
+            try:
+                refresh_variants(post)
+            except (OSError, ValueError) as e:
+                failed += 1
+                self.stderr.write(f'Публикация {post.pk}: {e}')
+                continue
+            invalidate_page_tags(*get_post_page_tags(post.pk))
+            done += 1
+            if options['verbosity'] > 1 or number % 100 == 0:
+                self.stdout.write(f'Обработано {number} из {total}.')
+        style = self.style.WARNING if failed else self.style.SUCCESS
+        self.stdout.write(style(
+            f'Обновлено публикаций: {done}, с ошибкой: {failed}.'
+        ))
@@ -0,0 +1,34 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.cache import invalidate_page_tags
+from blog.paginators import invalidate_post_counts
+from blog.scheduling import last_check, remember_check, went_live_tags
+
+
+class Command(BaseCommand):
+    help = (
+        'Сбрасывает кеш страниц, на которых появились отложенные '
+        'публикации. Запускайте по расписанию, например раз в минуту.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--warm',
+            action='store_true',
+            help='Прогреть кеш страниц, если что-то было сброшено.'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        tags = went_live_tags(last_check(now), now)
+        if tags:
+            invalidate_page_tags(*tags)
+            invalidate_post_counts()
+        remember_check(now)
+        self.stdout.write(self.style.SUCCESS(
+            f'Сброшено тегов страниц: {len(tags)}.'
+        ))
+        if tags and options['warm']:
+            call_command('warm_cache', stdout=self.stdout)
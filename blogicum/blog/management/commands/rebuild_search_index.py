@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс публикаций.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO blog_post_fts (blog_post_fts) VALUES ('rebuild')"
+            )
+            cursor.execute(
+                "INSERT INTO blog_post_fts (blog_post_fts) VALUES ('optimize')"
+            )
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс перестроен.'))
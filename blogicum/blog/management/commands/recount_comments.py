@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённое количество комментариев у публикаций.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить счётчики, ничего не исправляя.'
+        )
+
+    def handle(self, *args, **options):
+        actual = Coalesce(Subquery(
+            Comment.objects.filter(
+                post=OuterRef('pk')
+            ).order_by().values('post').annotate(
+                total=Count('pk')
+            ).values('total')
+        ), 0)
+        with transaction.atomic():
+            broken = Post.objects.annotate(
+                actual_count=actual
+            ).exclude(comment_count=F('actual_count'))
+            broken_count = broken.count()
+            if options['check']:
+                if broken_count:
+                    raise CommandError(
+                        f'Неверный счётчик комментариев у {broken_count} '
+                        'публикаций.'
+                    )
+                self.stdout.write(self.style.SUCCESS(
+                    'Счётчики комментариев корректны.'
+                ))
+                return
+            Post.objects.update(comment_count=actual)
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено публикаций: {broken_count}.'
+        ))
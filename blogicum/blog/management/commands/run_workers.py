@@ -0,0 +1,129 @@
+import os
+import signal
+import socket
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from blog.jobs import claim, job_stats, purge_finished, release_stale, run_job
+from blog.models import Job
+
+# Как часто проверять зависшие задачи и выводить метрики, в секундах.
+MAINTENANCE_INTERVAL = 60
+REPORT_INTERVAL = 10
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет фоновые задачи из очереди: обработку изображений '
+        'публикаций и другие работы, вынесенные из запросов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--poll-interval', type=float, default=1,
+            help='Пауза между проверками пустой очереди, в секундах.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и завершиться.'
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Только вывести состояние очереди.'
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.write_stats()
+            return
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        self.worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.results = Counter()
+        self.started = time.monotonic()
+        try:
+            self.process(options)
+        except KeyboardInterrupt:
+            pass
+        self.write_report()
+        self.write_stats()
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+    def process(self, options):
+        workers = max(options['workers'], 1)
+        maintained = reported = 0
+        running = set()
+        pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            while not self.stopping:
+                now = time.monotonic()
+                if now - maintained >= MAINTENANCE_INTERVAL:
+                    release_stale()
+                    purge_finished()
+                    maintained = now
+                if now - reported >= REPORT_INTERVAL and self.results:
+                    self.write_report()
+                    reported = now
+                jobs = (
+                    claim(self.worker, workers - len(running))
+                    if len(running) < workers else []
+                )
+                if pool is None:
+                    for job in jobs:
+                        self.results[run_job(job)] += 1
+                else:
+                    running |= {
+                        pool.submit(self.run_in_thread, job) for job in jobs
+                    }
+                if not jobs and not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                elif running:
+                    done, running = wait(
+                        running,
+                        timeout=options['poll_interval'],
+                        return_when=FIRST_COMPLETED
+                    )
+                    self.results.update(future.result() for future in done)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+                self.results.update(future.result() for future in running)
+
+    def run_in_thread(self, job):
+        try:
+            return run_job(job)
+        finally:
+            connection.close()
+
+    def write_report(self):
+        elapsed = time.monotonic() - self.started
+        done = self.results[Job.Status.DONE]
+        self.stdout.write(
+            f'Выполнено задач: {done}, '
+            f'отложено для повтора: {self.results[Job.Status.PENDING]}, '
+            f'не выполнено: {self.results[Job.Status.DEAD]}, '
+            f'{done / elapsed if elapsed else 0:.2f} задач/с.'
+        )
+
+    def write_stats(self):
+        stats = job_stats()
+        self.stdout.write(
+            f'Очередь: ожидают {stats[Job.Status.PENDING]}, '
+            f'выполняются {stats[Job.Status.RUNNING]}, '
+            f'выполнены {stats[Job.Status.DONE]}, '
+            f'не выполнены {stats[Job.Status.DEAD]}; '
+            f'за час {stats["throughput"] * 3600:.0f} задач, '
+            f'в среднем {stats["duration"]:.2f} с на задачу, '
+            f'самая старая ждёт {stats["wait"]:.0f} с.'
+        )
@@ -0,0 +1,144 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.core.handlers.exception import convert_exception_to_response
+from django.db.models import Count
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from blog.constants import MAX_DISPLAY_POSTS
+from blog.models import Category, Post
+from blog.paginators import CursorPaginator
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает кеш страниц и карточек: первые страницы ленты, '
+        'категорий и профилей самых активных авторов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=5,
+            help='Сколько первых страниц ленты прогреть.'
+        )
+        parser.add_argument(
+            '--category-pages', type=int, default=2,
+            help='Сколько первых страниц каждой категории прогреть.'
+        )
+        parser.add_argument(
+            '--authors', type=int, default=20,
+            help='Сколько профилей самых активных авторов прогреть.'
+        )
+        parser.add_argument(
+            '--author-pages', type=int, default=1,
+            help='Сколько первых страниц каждого профиля прогреть.'
+        )
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--host',
+            help='Имя сайта в запросах; по умолчанию первое из ALLOWED_HOSTS.'
+        )
+
+    def handle(self, *args, **options):
+        host = options['host'] or next(iter(settings.ALLOWED_HOSTS), None)
+        if not host or '*' in host:
+            raise CommandError(
+                'Укажите --host: в ALLOWED_HOSTS нет готового имени сайта.'
+            )
+        self.factory = RequestFactory(HTTP_HOST=host.lstrip('.'))
+        urls = self.collect_urls(options)
+        self.stdout.write(f'Страниц для прогрева: {len(urls)}.')
+        started = time.monotonic()
+        failed = 0
+        for done, (url, status, elapsed) in enumerate(
+            self.render_all(urls, options['workers']), 1
+        ):
+            failed += status != 200
+            if options['verbosity'] > 1 or status != 200:
+                self.stdout.write(
+                    f'[{done}/{len(urls)}] {status} {url} '
+                    f'{elapsed * 1000:.0f} мс'
+                )
+            elif done % 10 == 0 or done == len(urls):
+                self.stdout.write(f'Прогрето {done} из {len(urls)}.')
+        elapsed = time.monotonic() - started
+        summary = (
+            f'Прогрето страниц: {len(urls) - failed}, с ошибкой: {failed}, '
+            f'за {elapsed:.2f} с.'
+        )
+        if failed:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    def collect_urls(self, options):
+        urls = self.page_urls(
+            reverse('blog:index'),
+            Post.objects.publish_filter(),
+            options['pages']
+        )
+        for category in Category.objects.filter(is_published=True):
+            urls += self.page_urls(
+                reverse('blog:category_posts', args=(category.slug,)),
+                category.posts.publish_filter(),
+                options['category_pages']
+            )
+        authors = Post.objects.publish_filter().values(
+            'author', 'author__username'
+        ).annotate(
+            published=Count('pk')
+        ).order_by('-published')[:options['authors']]
+        for author in authors:
+            urls += self.page_urls(
+                reverse('blog:profile', args=(author['author__username'],)),
+                Post.objects.publish_filter().filter(author=author['author']),
+                options['author_pages']
+            )
+        return urls
+
+    def page_urls(self, path, queryset, pages):
+        """Ссылки на первые страницы списка в том виде, как их строит view."""
+        paginator = CursorPaginator(
+            queryset.only('pk', 'pub_date'), MAX_DISPLAY_POSTS
+        )
+        urls = []
+        cursor = None
+        for _ in range(pages):
+            urls.append(f'{path}?after={cursor}' if cursor else path)
+            cursor = paginator.page(after=cursor).next_cursor
+            if cursor is None:
+                break
+        return urls
+
+    def render_all(self, urls, workers):
+        if workers <= 1:
+            yield from map(self.render, urls)
+            return
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self.render_in_thread, url) for url in urls]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def render_in_thread(self, url):
+        try:
+            return self.render(url)
+        finally:
+            connection.close()
+
+    def render(self, url):
+        """Вызывает view напрямую, как анонимный посетитель без сессии."""
+        started = time.monotonic()
+        request = self.factory.get(url)
+        request.user = AnonymousUser()
+        match = resolve(request.path_info)
+        # Http404 и прочие ошибки view становятся ответами, как на сайте.
+        response = convert_exception_to_response(
+            lambda request: match.func(request, *match.args, **match.kwargs)
+        )(request)
+        if hasattr(response, 'render'):
+            response.render()
+        return url, response.status_code, time.monotonic() - started
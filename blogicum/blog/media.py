@@ -0,0 +1,244 @@
+import mimetypes
+import posixpath
+import re
+import stat
+from hashlib import md5
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from .images import (
+    FORMAT_TYPES,
+    alternate_name,
+    available_formats,
+    variant_files,
+)
+from .models import MediaFile
+
+# Для этих типов файлов могут быть копии в современных форматах.
+NEGOTIABLE_TYPES = {'image/jpeg', 'image/png'}
+MEDIA_CHUNK_SIZE = 64 * 1024
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Файлы, названные по хешу содержимого, никогда не меняются.
+IMMUTABLE_NAME = re.compile(r'^post_images/[0-9a-f]{2}/[0-9a-f]{64}\.\w+$')
+
+for fmt, media_type in FORMAT_TYPES.items():
+    mimetypes.add_type(media_type, f'.{fmt}')
+
+
+def accepted_types(accept):
+    """Типы из заголовка Accept, явно разрешённые клиентом."""
+    accepted = set()
+    for item in accept.split(','):
+        media_type, *params = item.strip().split(';')
+        quality = 1
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+        if quality > 0:
+            accepted.add(media_type.strip().lower())
+    return accepted
+
+
+def negotiate(path, accept):
+    """Имя файла, который стоит отдать клиенту вместо path."""
+    accepted = accepted_types(accept)
+    for fmt in available_formats():
+        if FORMAT_TYPES[fmt] in accepted:
+            name = alternate_name(path, fmt)
+            if default_storage.exists(name):
+                return name
+    return path
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def media_path(name):
+    """Путь к файлу внутри MEDIA_ROOT; скрытые и внешние файлы не отдаются."""
+    name = posixpath.normpath(name).lstrip('/')
+    if any(part.startswith('.') for part in name.split('/')):
+        raise Http404
+    try:
+        return name, Path(safe_join(settings.MEDIA_ROOT, name))
+    except SuspiciousFileOperation:
+        raise Http404
+
+
+def parse_range(header, size):
+    """Границы (первый, последний байт) из Range или None для всего файла.
+
+    Несколько диапазонов сразу не поддерживаются: по RFC 9110 в этом случае
+    можно отдать файл целиком.
+    """
+    match = RANGE_HEADER.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        if int(last) == 0:
+            raise RangeNotSatisfiable
+        return max(size - int(last), 0), size - 1
+    first = int(first)
+    if last and int(last) < first:
+        return None
+    if first >= size:
+        raise RangeNotSatisfiable
+    return first, min(int(last), size - 1) if last else size - 1
+
+
+def range_allowed(request, etag, last_modified):
+    """If-Range: диапазон отдаётся, только если файл не изменился."""
+    if_range = request.headers.get('If-Range')
+    return if_range is None or if_range in (etag, http_date(last_modified))
+
+
+def iter_file(file, start, length):
+    with file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(MEDIA_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def file_response(request, name, path, size, etag, last_modified):
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    header = settings.MEDIA_SENDFILE_HEADER
+    if header:
+        # Файл отдаст прокси, он же обработает Range.
+        response = HttpResponse(content_type=content_type)
+        response[header] = (
+            quote(settings.MEDIA_ACCEL_REDIRECT_PREFIX + name)
+            if header == 'X-Accel-Redirect' else str(path)
+        )
+        return response
+    byte_range = None
+    if 'Range' in request.headers and range_allowed(
+        request, etag, last_modified
+    ):
+        try:
+            byte_range = parse_range(request.headers['Range'], size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    if byte_range is None:
+        response = FileResponse(path.open('rb'), content_type=content_type)
+        response.block_size = MEDIA_CHUNK_SIZE
+        return response
+    first, last = byte_range
+    response = StreamingHttpResponse(
+        iter_file(path.open('rb'), first, last - first + 1),
+        status=206,
+        content_type=content_type
+    )
+    response['Content-Range'] = f'bytes {first}-{last}/{size}'
+    response['Content-Length'] = last - first + 1
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """Отдаёт загруженный файл частями, с проверкой кеша и диапазонами."""
+    # Хранилище видит только уже проверенное имя.
+    name, full_path = media_path(path)
+    negotiable = mimetypes.guess_type(name)[0] in NEGOTIABLE_TYPES
+    # Копии в современных форматах появляются после загрузки, поэтому
+    # неизменным считается только то, что уже не заменится копией.
+    immutable = bool(IMMUTABLE_NAME.match(name))
+    if negotiable:
+        alternate = negotiate(name, request.headers.get('Accept', ''))
+        immutable = immutable and alternate != name
+        if alternate != name:
+            name, full_path = media_path(alternate)
+    try:
+        stat_result = full_path.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404
+    etag = '"{}"'.format(md5(
+        f'{name}:{stat_result.st_size}:{stat_result.st_mtime_ns}'.encode(),
+        usedforsecurity=False
+    ).hexdigest())
+    last_modified = int(stat_result.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    ) or file_response(
+        request, name, full_path, stat_result.st_size, etag, last_modified
+    )
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    if immutable:
+        patch_cache_control(
+            response, public=True, max_age=60 * 60 * 24 * 365, immutable=True
+        )
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE
+        )
+    if negotiable:
+        patch_vary_headers(response, ('Accept',))
+    return response
+
+
+def acquire_file(name):
+    """Добавляет ссылку на загруженный файл."""
+    if MediaFile.objects.filter(name=name).update(
+        references=F('references') + 1
+    ):
+        return
+    try:
+        with transaction.atomic():
+            MediaFile.objects.create(name=name, references=1)
+    except IntegrityError:
+        MediaFile.objects.filter(name=name).update(
+            references=F('references') + 1
+        )
+
+
+def release_file(name, variants):
+    """Снимает ссылку и удаляет файл с копиями, когда ссылок не осталось."""
+    MediaFile.objects.filter(name=name, references__gt=0).update(
+        references=F('references') - 1
+    )
+    if MediaFile.objects.filter(name=name, references__lte=0).delete()[0]:
+        names = {name}
+        if variants.get('source') == name:
+            names |= variant_files(variants)
+        transaction.on_commit(lambda: delete_unreferenced(name, names))
+
+
+def delete_unreferenced(name, names):
+    # Пока транзакция шла, тот же файл могли загрузить снова.
+    if not MediaFile.objects.filter(name=name).exists():
+        for path in names:
+            default_storage.delete(path)
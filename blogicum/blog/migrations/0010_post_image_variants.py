@@ -0,0 +1,28 @@
+from importlib import import_module
+
+from django.db import migrations, models
+
+search_index = import_module('blog.migrations.0009_post_search_index')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_search_index'),
+    ]
+
+    # SQLite пересоздаёт таблицу при добавлении поля и теряет её триггеры,
+    # поэтому поисковый индекс снимается и строится заново.
+    operations = [
+        migrations.RunSQL(search_index.DROP_INDEX, search_index.CREATE_INDEX),
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.JSONField(
+                default=dict,
+                editable=False,
+                verbose_name='Уменьшенные копии изображения'
+            ),
+        ),
+        migrations.RunSQL(search_index.CREATE_INDEX, search_index.DROP_INDEX),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:36
+
+import blog.storage
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_references(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    MediaFile = apps.get_model('blog', 'MediaFile')
+    MediaFile.objects.bulk_create(
+        MediaFile(name=row['image'], references=row['total'])
+        for row in Post.objects.exclude(image='').order_by().values(
+            'image'
+        ).annotate(total=Count('pk')).iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Добавлено')),
+                ('name', models.CharField(max_length=256, unique=True, verbose_name='Путь к файлу')),
+                ('references', models.PositiveIntegerField(default=0, verbose_name='Ссылок')),
+            ],
+            options={
+                'verbose_name': 'загруженный файл',
+                'verbose_name_plural': 'Загруженные файлы',
+                'ordering': ('created_at',),
+                'abstract': False,
+            },
+        ),
+        # Хранилище не влияет на схему, а пересоздание таблицы в SQLite
+        # удалило бы триггеры поискового индекса.
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='post',
+                name='image',
+                field=models.ImageField(
+                    blank=True,
+                    storage=blog.storage.ContentAddressedStorage(),
+                    upload_to='post_images',
+                    verbose_name='Изображение'
+                ),
+            ),
+        ]),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.16 on 2026-10-18 06:35
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_media_file'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='category',
+            name='category_published_idx',
+        ),
+    ]
@@ -1,15 +1,166 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
 from django.urls import reverse
 from django.shortcuts import redirect
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 
+from .cache import (
+    GLOBAL_PAGE_TAG,
+    get_page_cache_key,
+    get_page_validators,
+    record_stats,
+)
 from .forms import PostForm, CommentForm
-from .models import Post, Comment
+from .models import Post, Comment, publication_cutoff
+from .paginators import CachedCountPaginator, CursorPaginator, InvalidCursor
+from .scheduling import cap_timeout
+from .utils import request_cached
 
 
 class OnlyAuthorMixin(UserPassesTestMixin):
+    @request_cached
+    def get_object(self, queryset=None):
+        return super().get_object(queryset)
+
     def test_func(self):
+        return self.get_object().author_id == self.request.user.id
+
+
+class PageTagsMixin:
+    def get_page_cache_tags(self):
+        return (GLOBAL_PAGE_TAG,)
+
+    def get_last_modified_floor(self):
+        return None
+
+
+class ConditionalGetMixin(PageTagsMixin):
+    """Отвечает 304 по версиям тегов страницы, не обращаясь к базе."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        etag, last_modified = get_page_validators(
+            request,
+            self.get_page_cache_tags(),
+            self.get_last_modified_floor()
+        )
+        last_modified = int(last_modified.timestamp())
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified
+        )
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response.setdefault('ETag', etag)
+            response.setdefault('Last-Modified', http_date(last_modified))
+        return response
+
+
+class ScheduledPublicationMixin(PageTagsMixin):
+    """Ограничивает сроки кеширования ближайшей отложенной публикацией."""
+
+    def get_last_modified_floor(self):
+        # Отложенные публикации появляются в полночь по местному времени.
+        return publication_cutoff() - timedelta(days=1)
+
+    def get_publication_filters(self):
+        return {}
 
-        return self.get_object().author == self.request.user
+    def get_cache_timeout(self, timeout):
+        return cap_timeout(
+            timeout,
+            self.get_page_cache_tags(),
+            **self.get_publication_filters()
+        )
+
+
+class AnonymousPageCacheMixin(ScheduledPublicationMixin):
+    """Кеширует страницу целиком для посетителей без сессии."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if (
+            request.method != 'GET'
+            or settings.SESSION_COOKIE_NAME in request.COOKIES
+        ):
+            return super().dispatch(request, *args, **kwargs)
+        key = get_page_cache_key(request, self.get_page_cache_tags())
+        cached = cache.get(key)
+        if cached is None:
+            dispatch = super().dispatch
+            rendered = []
+
+            def render():
+                response = dispatch(request, *args, **kwargs)
+                rendered.append(response)
+                if (
+                    response.status_code != 200
+                    or request.META.get('CSRF_COOKIE_USED')
+                ):
+                    return None
+                if hasattr(response, 'render'):
+                    response.render()
+                record_stats('page', misses=1)
+                return (response.content, response['Content-Type'])
+
+            # Пока страница собирается, остальные запросы ждут её в кеше.
+            cached = cache.get_or_set(
+                key,
+                render,
+                self.get_cache_timeout(settings.PAGE_CACHE_TIMEOUT)
+            )
+            if rendered:
+                return rendered[0]
+            if cached is None:
+                return dispatch(request, *args, **kwargs)
+        record_stats('page', hits=1)
+        content, content_type = cached
+        return HttpResponse(content, content_type=content_type)
+
+
+class CursorPaginationMixin:
+    cursor_paginator_class = CursorPaginator
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.page_kwarg in self.request.GET:
+            return super().paginate_queryset(queryset, page_size)
+        paginator = self.cursor_paginator_class(queryset, page_size)
+        try:
+            page = paginator.page(
+                after=self.request.GET.get('after'),
+                before=self.request.GET.get('before'),
+            )
+        except InvalidCursor as e:
+            raise Http404(str(e))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class CachedCountMixin(ScheduledPublicationMixin):
+    paginator_class = CachedCountPaginator
+
+    def get_count_cache_key(self):
+        return (self.request.resolver_match.view_name,)
+
+    def get_paginator(self, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True, **kwargs):
+        return super().get_paginator(
+            queryset,
+            per_page,
+            orphans,
+            allow_empty_first_page,
+            cache_key=self.get_count_cache_key(),
+            cache_timeout=self.get_cache_timeout(
+                settings.POST_COUNT_CACHE_TIMEOUT
+            ),
+            **kwargs
+        )
 
 
 class PostMixin(OnlyAuthorMixin, LoginRequiredMixin):
@@ -32,7 +183,8 @@ class PostMixin(OnlyAuthorMixin, LoginRequiredMixin):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['form'] = PostForm(instance=self.object)
+        if 'form' not in context:
+            context['form'] = PostForm(instance=self.object)
         return context
 
 
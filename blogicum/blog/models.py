@@ -1,32 +1,124 @@
+from datetime import datetime, time, timedelta
+
 from django.db import models
-from django.db.models import Count
+from django.db.models.query import ModelIterable
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from django.utils.text import Truncator
 
-from blog.constants import CHARFIELD_LENGTH, MAX_DISPLAY_HEADING
+from blog.constants import (
+    CHARFIELD_LENGTH,
+    EXCERPT_WORDS,
+    MAX_DISPLAY_HEADING,
+    SEARCH_RANK_WINDOW,
+    SNIPPET_END,
+    SNIPPET_START,
+    SNIPPET_WORDS,
+)
+from blog.lookups import categories, locations
+from blog.storage import post_image_storage
 
 User = get_user_model()
 
 
+def publication_cutoff(moment=None):
+    """Граница, до которой публикации уже видны читателям."""
+    return timezone.make_aware(datetime.combine(
+        timezone.localdate(moment) + timedelta(days=1), time.min
+    ))
+
+
+class LookupIterable(ModelIterable):
+    """Подставляет категорию и местоположение из кеша процесса."""
+
+    def __iter__(self):
+        opts = self.queryset.model._meta
+        related = [
+            (opts.get_field(name), table.as_dict())
+            for name, table in (
+                ('category', categories),
+                ('location', locations),
+            )
+        ]
+        for obj in super().__iter__():
+            for field, rows in related:
+                row = rows.get(getattr(obj, field.attname))
+                if row is not None:
+                    field.set_cached_value(obj, row)
+            yield obj
+
+
 class PostQuerySet(models.QuerySet):
+    def with_lookups(self):
+        queryset = self._chain()
+        queryset._iterable_class = LookupIterable
+        return queryset
+
     def annotate_select_comments(self):
         return self.select_related(
-            'author',
-            'location',
-            'category'
-        ).annotate(
-            comment_count=Count('comments')
+            'author'
+        ).with_lookups().defer(
+            'text'
         ).order_by(
-            '-pub_date'
+            '-pub_date',
+            '-pk'
         )
 
-    def publish_filter(self):
-        return self.filter(
-            pub_date__date__lte=timezone.now(),
+    @staticmethod
+    def published():
+        return models.Q(
+            pub_date__lt=publication_cutoff(),
             is_published=True,
             category__is_published=True,
         )
 
+    def publish_filter(self):
+        return self.filter(self.published())
+
+    def search(self, query):
+        terms = ' '.join(
+            '"{}"'.format(word.replace('"', '""')) for word in query.split()
+        )
+        # bm25 считается только для SEARCH_RANK_WINDOW новых видимых
+        # совпадений, остальные идут следом от новых к старым.
+        window = self.filter(pk__in=RawSQL(
+            'SELECT rowid FROM blog_post_fts WHERE blog_post_fts MATCH %s',
+            (terms,)
+        )).order_by('-pk').values('pk')[
+            SEARCH_RANK_WINDOW - 1:SEARCH_RANK_WINDOW
+        ]
+        queryset = self.extra(
+            tables=['blog_post_fts'],
+            where=[
+                'blog_post_fts.rowid = blog_post.id',
+                'blog_post_fts MATCH %s',
+            ],
+            params=[terms],
+        ).annotate(
+            rank=models.Case(
+                models.When(
+                    pk__gte=Coalesce(models.Subquery(window), 0),
+                    then=RawSQL('blog_post_fts.rank', ()),
+                ),
+                default=models.Value(0.0),
+                output_field=models.FloatField(),
+            ),
+            snippet=RawSQL(
+                'snippet(blog_post_fts, -1, %s, %s, %s, %s)',
+                (SNIPPET_START, SNIPPET_END, '…', SNIPPET_WORDS)
+            ),
+        ).order_by('rank', '-pk')
+        if not terms:
+            return queryset.none()
+        return queryset
+
+    def visible_to(self, user):
+        if user.is_authenticated:
+            return self.filter(self.published() | models.Q(author=user))
+        return self.publish_filter()
+
 
 class CreatedAt(models.Model):
     created_at = models.DateTimeField(
@@ -91,6 +183,11 @@ class Post(IsPublishedCreatedAt):
         max_length=CHARFIELD_LENGTH
     )
     text = models.TextField('Текст')
+    excerpt = models.TextField(
+        'Начало текста',
+        blank=True,
+        editable=False
+    )
     pub_date = models.DateTimeField(
         'Дата и время публикации',
         help_text='Если установить дату и время в будущем — '
@@ -120,18 +217,66 @@ class Post(IsPublishedCreatedAt):
     image = models.ImageField(
         'Изображение',
         upload_to='post_images',
+        storage=post_image_storage,
         blank=True
     )
+    image_variants = models.JSONField(
+        'Уменьшенные копии изображения',
+        default=dict,
+        editable=False
+    )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
     objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         default_related_name = 'posts'
+        indexes = (
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_published=True),
+                name='post_published_idx'
+            ),
+            models.Index(
+                fields=('category', 'pub_date'),
+                condition=models.Q(is_published=True),
+                name='post_category_published_idx'
+            ),
+            models.Index(
+                fields=('author', 'pub_date'),
+                name='post_author_pub_date_idx'
+            ),
+        )
 
     def __str__(self):
         return self.title[:MAX_DISPLAY_HEADING]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Прежнее изображение нужно, чтобы при сохранении снять с него ссылку.
+        if 'image' in field_names:
+            instance._loaded_image = values[field_names.index('image')]
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        # Отложенный текст не загружается ради выдержки: он не сохраняется.
+        if 'text' not in self.get_deferred_fields() and (
+            update_fields is None or 'text' in update_fields
+        ):
+            self.excerpt = Truncator(self.text).words(
+                EXCERPT_WORDS, truncate=' …'
+            )
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+
 
 class Comment(CreatedAt):
     text = models.TextField('Текст комментария')
@@ -151,6 +296,76 @@ class Comment(CreatedAt):
     class Meta(CreatedAt.Meta):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_at_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:MAX_DISPLAY_HEADING]
+
+
+class MediaFile(CreatedAt):
+    name = models.CharField(
+        'Путь к файлу',
+        max_length=CHARFIELD_LENGTH,
+        unique=True
+    )
+    references = models.PositiveIntegerField('Ссылок', default=0)
+
+    class Meta(CreatedAt.Meta):
+        verbose_name = 'загруженный файл'
+        verbose_name_plural = 'Загруженные файлы'
+
+    def __str__(self):
+        return self.name
+
+
+class Job(CreatedAt):
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Ожидает'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Выполнена'
+        DEAD = 'dead', 'Не выполнена'
+
+    task = models.CharField('Задача', max_length=CHARFIELD_LENGTH)
+    payload = models.JSONField('Параметры', default=dict)
+    status = models.CharField(
+        'Состояние',
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    run_after = models.DateTimeField(
+        'Не раньше',
+        default=timezone.now
+    )
+    locked_by = models.CharField(
+        'Обработчик',
+        max_length=CHARFIELD_LENGTH,
+        blank=True
+    )
+    started_at = models.DateTimeField('Начата', null=True, blank=True)
+    finished_at = models.DateTimeField('Завершена', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta(CreatedAt.Meta):
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = (
+            models.Index(
+                fields=('run_after',),
+                condition=models.Q(status='pending'),
+                name='job_pending_idx'
+            ),
+            models.Index(
+                fields=('status', 'finished_at'),
+                name='job_status_finished_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.task} #{self.pk}'
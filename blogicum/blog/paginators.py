@@ -0,0 +1,226 @@
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, InvalidPage, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+CURSOR_SEPARATOR = '|'
+POST_COUNT_GENERATION_KEY = 'blog:post_count_generation'
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorPage(Sequence):
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if self.has_next() and self.object_list:
+            return self.paginator.encode_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous() and self.object_list:
+            return self.paginator.encode_cursor(self.object_list[0])
+        return None
+
+
+class CursorPaginator:
+    """Постраничный вывод по ключу (field, id) без OFFSET и COUNT."""
+
+    field = 'pub_date'
+    descending = True
+    # Порядок id среди равных field; None — тот же, что у field.
+    pk_descending = None
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    def format_value(self, value):
+        return value.isoformat()
+
+    def parse_value(self, value):
+        value = parse_datetime(value)
+        if value is None:
+            raise ValueError(value)
+        return value
+
+    def encode_cursor(self, obj):
+        value = self.format_value(getattr(obj, self.field))
+        return urlsafe_base64_encode(
+            f'{value}{CURSOR_SEPARATOR}{obj.pk}'.encode()
+        )
+
+    def decode_cursor(self, cursor):
+        try:
+            value, pk = force_str(
+                urlsafe_base64_decode(cursor)
+            ).split(CURSOR_SEPARATOR)
+            return self.parse_value(value), int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise InvalidCursor('Некорректный курсор страницы.')
+
+    def _seek(self, queryset, cursor, forward):
+        value, pk = self.decode_cursor(cursor)
+        lookup = 'lt' if forward == self.descending else 'gt'
+        pk_lookup = 'lt' if forward == self.get_pk_descending() else 'gt'
+        return queryset.filter(
+            **{f'{self.field}__{lookup}e': value}
+        ).filter(
+            Q(**{f'{self.field}__{lookup}': value})
+            | Q(**{f'pk__{pk_lookup}': pk})
+        )
+
+    def get_pk_descending(self):
+        if self.pk_descending is None:
+            return self.descending
+        return self.pk_descending
+
+    def _ordering(self, forward):
+        prefix = '-' if forward == self.descending else ''
+        pk_prefix = '-' if forward == self.get_pk_descending() else ''
+        return f'{prefix}{self.field}', f'{pk_prefix}pk'
+
+    def page(self, after=None, before=None):
+        queryset = self.object_list
+        if before:
+            objects = list(
+                self._seek(queryset, before, forward=False).order_by(
+                    *self._ordering(forward=False)
+                )[:self.per_page + 1]
+            )
+            has_previous = len(objects) > self.per_page
+            objects = objects[:self.per_page][::-1]
+            return CursorPage(objects, self, bool(objects), has_previous)
+        if after:
+            queryset = self._seek(queryset, after, forward=True)
+        objects = list(
+            queryset.order_by(*self._ordering(forward=True))[
+                :self.per_page + 1
+            ]
+        )
+        has_next = len(objects) > self.per_page
+        return CursorPage(
+            objects[:self.per_page], self, has_next, bool(after)
+        )
+
+
+class CommentCursorPaginator(CursorPaginator):
+    field = 'created_at'
+    descending = False
+
+
+class SearchCursorPaginator(CursorPaginator):
+    field = 'rank'
+    descending = False
+    pk_descending = True
+
+    def format_value(self, value):
+        return repr(value)
+
+    def parse_value(self, value):
+        return float(value)
+
+
+def invalidate_post_counts():
+    try:
+        cache.incr(POST_COUNT_GENERATION_KEY)
+    except ValueError:
+        cache.set(POST_COUNT_GENERATION_KEY, 1, None)
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который кеширует общее число записей по ключу.
+
+    Если задан POST_COUNT_ESTIMATE_THRESHOLD, записи считаются не дальше
+    порога, а число страниц становится оценкой снизу.
+    """
+
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True, cache_key=None,
+                 cache_timeout=None):
+        super().__init__(
+            object_list, per_page, orphans, allow_empty_first_page
+        )
+        self.cache_key = cache_key
+        self.cache_timeout = (
+            settings.POST_COUNT_CACHE_TIMEOUT
+            if cache_timeout is None else cache_timeout
+        )
+        self.is_estimated = False
+
+    def get_cache_key(self):
+        generation = cache.get(POST_COUNT_GENERATION_KEY, 0)
+        return ':'.join(
+            ('blog:post_count', str(generation), *map(str, self.cache_key))
+        )
+
+    @cached_property
+    def count(self):
+        key = self.get_cache_key() if self.cache_key else None
+        cached = cache.get(key) if key else None
+        if cached is not None:
+            count, self.is_estimated = cached
+            return count
+        threshold = settings.POST_COUNT_ESTIMATE_THRESHOLD
+        if threshold:
+            count = self.object_list.order_by()[:threshold + 1].count()
+            self.is_estimated = count > threshold
+        else:
+            count = self.object_list.count()
+        if key:
+            cache.set(
+                key,
+                (count, self.is_estimated),
+                self.cache_timeout
+            )
+        return count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if self.is_estimated and int(number) > 1:
+                return int(number)
+            raise
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.is_estimated:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        object_list = self.object_list[bottom:bottom + self.per_page]
+        if number > 1 and not object_list:
+            raise EmptyPage('That page contains no results')
+        return self._get_page(object_list, number, self)
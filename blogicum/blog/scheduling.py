@@ -0,0 +1,82 @@
+import math
+from datetime import datetime, time, timedelta
+from hashlib import md5
+
+from django.core.cache import cache
+from django.db.models import Min
+from django.utils import timezone
+
+from .cache import get_page_tag_versions, post_page_tags
+from .models import Post, publication_cutoff
+
+NEXT_PUBLICATION_KEY = 'blog:next_publication:{}'
+LAST_CHECK_KEY = 'blog:scheduled_checked_at'
+NO_PUBLICATION = 'none'
+
+
+def goes_live_at(pub_date):
+    """Момент, с которого publish_filter() начинает показывать публикацию."""
+    return timezone.make_aware(
+        datetime.combine(timezone.localdate(pub_date), time.min)
+    )
+
+
+def next_publication(tags, **filters):
+    """Ближайший момент, когда в выборке появится отложенная публикация.
+
+    Результат кешируется под версиями тех же тегов, что и страницы,
+    поэтому сбрасывается вместе с ними при сохранении публикаций.
+    """
+    versions = get_page_tag_versions(tags)
+    key = NEXT_PUBLICATION_KEY.format(md5(
+        repr((tuple(tags), versions)).encode(), usedforsecurity=False
+    ).hexdigest())
+    cached = cache.get(key)
+    if cached == NO_PUBLICATION:
+        return None
+    if cached is not None and cached > timezone.now():
+        return cached
+    pub_date = Post.objects.filter(
+        is_published=True,
+        category__is_published=True,
+        pub_date__gte=publication_cutoff(),
+        **filters
+    ).aggregate(next=Min('pub_date'))['next']
+    moment = goes_live_at(pub_date) if pub_date else None
+    cache.set(key, moment or NO_PUBLICATION, None)
+    return moment
+
+
+def cap_timeout(timeout, tags, **filters):
+    """Срок кеширования, который не переживёт ближайшую публикацию."""
+    moment = next_publication(tags, **filters)
+    if moment is None:
+        return timeout
+    remaining = math.ceil((moment - timezone.now()).total_seconds())
+    return max(1, min(timeout, remaining))
+
+
+def went_live(since, until):
+    """Публикации, ставшие видимыми после since и не позже until."""
+    return Post.objects.filter(
+        is_published=True,
+        category__is_published=True,
+        pub_date__gte=publication_cutoff(since),
+        pub_date__lt=publication_cutoff(until),
+    )
+
+
+def went_live_tags(since, until):
+    rows = went_live(since, until).values_list(
+        'category__slug',
+        'author__username'
+    ).distinct()
+    return {tag for row in rows for tag in post_page_tags(*row)}
+
+
+def last_check(now):
+    return cache.get(LAST_CHECK_KEY) or now - timedelta(days=1)
+
+
+def remember_check(now):
+    cache.set(LAST_CHECK_KEY, now, None)
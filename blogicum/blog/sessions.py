@@ -0,0 +1,45 @@
+import time
+
+from django.contrib.sessions.backends.cached_db import (
+    SessionStore as CachedDBSessionStore
+)
+
+
+class SessionStore(CachedDBSessionStore):
+    """Сессия читается из кеша, а срок продлевается не на каждом запросе.
+
+    Пока данные сессии не менялись, срок продлевается в кеше и в базе
+    только после того, как прошла половина срока жизни сессии.
+    """
+
+    def get_refreshed_key(self, session_key):
+        return f'{self.cache_key_prefix}{session_key}:refreshed'
+
+    def needs_refresh(self):
+        refreshed = self._cache.get(self.get_refreshed_key(self.session_key))
+        return (
+            refreshed is None
+            or time.time() - refreshed >= self.get_expiry_age() / 2
+        )
+
+    def save(self, must_create=False):
+        if not (
+            must_create
+            or self.modified
+            or self.session_key is None
+            or self.needs_refresh()
+        ):
+            return
+        super().save(must_create)
+        self._cache.set(
+            self.get_refreshed_key(self.session_key),
+            time.time(),
+            self.get_expiry_age()
+        )
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            session_key = self.session_key
+        if session_key is not None:
+            self._cache.delete(self.get_refreshed_key(session_key))
+        super().delete(session_key)
@@ -0,0 +1,217 @@
+import threading
+
+from django.db.backends.signals import connection_created
+from django.db import connections, transaction
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from .backends import invalidate_cached_user
+from .cache import GLOBAL_PAGE_TAG, invalidate_page_tags, post_page_tags
+from .db import apply_sqlite_pragmas
+from .images import pending_variants, variants_are_stale
+from .jobs import enqueue
+from .media import acquire_file, release_file
+from .lookups import get_table
+from .models import Category, Comment, Location, Post, User
+from .paginators import invalidate_post_counts
+
+IMAGE_VARIANTS_TASK = 'blog.tasks.generate_image_variants'
+
+# Публикации, которые удаляются вместе с комментариями в этом потоке.
+_deleting = threading.local()
+
+
+def deleting_posts():
+    if not hasattr(_deleting, 'posts'):
+        _deleting.posts = {}
+    return _deleting.posts
+
+
+def is_post_deleting(post_id, using):
+    unmark = deleting_posts().get(post_id)
+    if unmark is None:
+        return False
+    # При откате удаления Django выбрасывает отложенную функцию, и пометка
+    # больше не действует.
+    if any(func is unmark for _, func in connections[using].run_on_commit):
+        return True
+    deleting_posts().pop(post_id, None)
+    return False
+
+
+@receiver(pre_delete, sender=Post)
+def mark_post_deleting(sender, instance, using, **kwargs):
+    posts, pk = deleting_posts(), instance.pk
+
+    def unmark():
+        posts.pop(pk, None)
+
+    posts[pk] = unmark
+    transaction.on_commit(unmark, using)
+
+
+@receiver(post_delete, sender=Post)
+def unmark_post_deleting(sender, instance, **kwargs):
+    deleting_posts().pop(instance.pk, None)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, using, **kwargs):
+    if is_post_deleting(instance.post_id, using):
+        return
+    Post.objects.filter(
+        pk=instance.post_id,
+        comment_count__gt=0
+    ).update(
+        comment_count=F('comment_count') - 1
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def reset_post_counts(sender, **kwargs):
+    invalidate_post_counts()
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            apply_sqlite_pragmas(cursor)
+
+
+def get_post_page_tags(post_id):
+    row = Post.objects.filter(pk=post_id).values_list(
+        'category__slug',
+        'author__username'
+    ).first()
+    if row is None:
+        return ()
+    return (*post_page_tags(*row), f'post:{post_id}')
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_delete, sender=Post)
+def remember_post_pages(sender, instance, **kwargs):
+    instance._page_tags = (
+        get_post_page_tags(instance.pk) if instance.pk else ()
+    )
+
+
+@receiver(pre_save, sender=Post)
+def remember_loaded_image(sender, instance, **kwargs):
+    if not hasattr(instance, '_loaded_image'):
+        instance._loaded_image = instance.pk and Post.objects.filter(
+            pk=instance.pk
+        ).values_list('image', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def track_image_references(sender, instance, **kwargs):
+    old, new = instance._loaded_image or '', instance.image.name or ''
+    instance._loaded_image = new
+    if old == new:
+        return
+    if new:
+        acquire_file(new)
+    if old:
+        release_file(old, instance.image_variants)
+
+
+@receiver(post_delete, sender=Post)
+def release_image(sender, instance, **kwargs):
+    if instance.image:
+        release_file(instance.image.name, instance.image_variants)
+
+
+def find_shared_variants(post):
+    """Готовые копии того же файла у другой публикации."""
+    for variants in Post.objects.filter(
+        image=post.image.name
+    ).exclude(pk=post.pk).values_list('image_variants', flat=True)[:10]:
+        if (
+            variants.get('source') == post.image.name
+            and not variants.get('pending')
+        ):
+            return variants
+    return None
+
+
+@receiver(post_save, sender=Post)
+def schedule_image_variants(sender, instance, raw=False, **kwargs):
+    if raw or not variants_are_stale(instance):
+        return
+    # Копии готовятся в фоне: до тех пор шаблоны выводят оригинал.
+    instance.image_variants = instance.image and find_shared_variants(
+        instance
+    ) or pending_variants(instance.image)
+    Post.objects.filter(pk=instance.pk).update(
+        image_variants=instance.image_variants
+    )
+    if instance.image_variants.get('pending'):
+        enqueue(IMAGE_VARIANTS_TASK, source=instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    invalidate_page_tags(
+        *instance._page_tags,
+        *get_post_page_tags(instance.pk)
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, using, **kwargs):
+    # Страницы удаляемой публикации сбросит invalidate_post_pages.
+    if is_post_deleting(instance.post_id, using):
+        return
+    # Комментарии выводятся только на странице публикации; счётчик в
+    # карточках списков обновится вместе с ключом карточки.
+    invalidate_page_tags(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_all_pages(sender, **kwargs):
+    invalidate_page_tags(GLOBAL_PAGE_TAG)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_lookup_table(sender, **kwargs):
+    table = get_table(sender)
+    table.invalidate()
+    # Другие процессы могли перечитать таблицу до фиксации транзакции.
+    transaction.on_commit(table.invalidate)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+    transaction.on_commit(lambda: invalidate_cached_user(instance.pk))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_pages(sender, created, update_fields, **kwargs):
+    if not created and (update_fields is None or 'username' in update_fields):
+        invalidate_page_tags(GLOBAL_PAGE_TAG)
@@ -0,0 +1,21 @@
+from .cache import invalidate_page_tags
+from .images import build_variants
+from .models import Post
+from .signals import get_post_page_tags
+
+
+def generate_image_variants(source):
+    """Готовит копии файла для всех публикаций, которые их ждут."""
+    posts = Post.objects.filter(image=source, image_variants__pending=True)
+    post = posts.only('pk', 'image').first()
+    # Если файл уже никому не нужен, его копии подберёт gc_media.
+    if post is None:
+        return
+    variants = build_variants(post.image)
+    post_ids = list(posts.values_list('pk', flat=True))
+    Post.objects.filter(pk__in=post_ids, image=source).update(
+        image_variants=variants
+    )
+    invalidate_page_tags(*(
+        tag for post_id in post_ids for tag in get_post_page_tags(post_id)
+    ))
@@ -0,0 +1,10 @@
+from django import template
+
+from blog.cache import render_post_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    return render_post_cards(list(posts))
@@ -0,0 +1,12 @@
+from django import template
+
+from blog.images import image_context
+
+register = template.Library()
+
+POST_IMAGE_TEMPLATE = 'includes/post_image.html'
+
+
+@register.inclusion_tag(POST_IMAGE_TEMPLATE)
+def post_image(post, kind, lazy=True, css_class=''):
+    return {**image_context(post, kind, lazy), 'css_class': css_class}
@@ -0,0 +1,16 @@
+from django import template
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from blog.constants import SNIPPET_END, SNIPPET_START
+
+register = template.Library()
+
+
+@register.filter
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(SNIPPET_START, '<mark>')
+        .replace(SNIPPET_END, '</mark>')
+    )
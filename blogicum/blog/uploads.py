@@ -0,0 +1,231 @@
+import shutil
+import struct
+import warnings
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+COPY_CHUNK_SIZE = 64 * 1024
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP'}
+ORIENTATION_TAG = 0x0112
+# Сегменты JPEG с метаданными: APP1 (EXIF, XMP), APP13 (IPTC), комментарий.
+JPEG_METADATA_MARKERS = {0xE1, 0xED, 0xFE}
+JPEG_STANDALONE_MARKERS = {0x01, *range(0xD0, 0xD8)}
+JPEG_SOS, JPEG_EOI, JPEG_APP0 = 0xDA, 0xD9, 0xE0
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_METADATA_CHUNKS = {b'eXIf', b'tEXt', b'zTXt', b'iTXt', b'tIME'}
+REENCODE_QUALITY = 90
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку на диск и перестаёт сохранять её после лимита.
+
+    Данные сверх IMAGE_UPLOAD_MAX_BYTES дочитываются из запроса и
+    отбрасываются, а файл помечается too_large, чтобы форма показала ошибку.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.too_large = False
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.too_large:
+            return None
+        if self.received > settings.IMAGE_UPLOAD_MAX_BYTES:
+            self.too_large = True
+            self.file.truncate(0)
+            return None
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        # Размер остаётся настоящим, чтобы форма сообщила о лимите, а не
+        # о пустом файле.
+        file = super().file_complete(file_size)
+        file.too_large = self.too_large
+        return file
+
+
+def read_exactly(file, size):
+    data = file.read(size)
+    if len(data) != size:
+        raise ValueError('Файл обрывается.')
+    return data
+
+
+def copy_rest(source, target, size=None):
+    if size is None:
+        shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+        return
+    while size > 0:
+        chunk = read_exactly(source, min(COPY_CHUNK_SIZE, size))
+        target.write(chunk)
+        size -= len(chunk)
+
+
+def orientation_exif(orientation):
+    exif = Image.Exif()
+    exif[ORIENTATION_TAG] = orientation
+    return exif.tobytes()
+
+
+def strip_jpeg(source, target, orientation):
+    """Копирует JPEG без метаданных, не перекодируя изображение."""
+    if read_exactly(source, 2) != b'\xff\xd8':
+        raise ValueError('Нет начала JPEG.')
+    target.write(b'\xff\xd8')
+    exif = orientation_exif(orientation) if orientation != 1 else None
+    while True:
+        if read_exactly(source, 1) != b'\xff':
+            raise ValueError('Повреждённый маркер JPEG.')
+        marker = read_exactly(source, 1)[0]
+        while marker == 0xFF:
+            marker = read_exactly(source, 1)[0]
+        if marker in JPEG_STANDALONE_MARKERS:
+            target.write(bytes((0xFF, marker)))
+            continue
+        if exif is not None and marker != JPEG_APP0:
+            # Поворот снимка нужен браузеру, остальной EXIF — нет.
+            target.write(b'\xff\xe1' + struct.pack('>H', len(exif) + 2))
+            target.write(exif)
+            exif = None
+        if marker in (JPEG_SOS, JPEG_EOI):
+            target.write(bytes((0xFF, marker)))
+            copy_rest(source, target)
+            return
+        length = read_exactly(source, 2)
+        payload = struct.unpack('>H', length)[0] - 2
+        if marker in JPEG_METADATA_MARKERS:
+            source.seek(payload, 1)
+            continue
+        target.write(bytes((0xFF, marker)) + length)
+        copy_rest(source, target, payload)
+
+
+def strip_png(source, target):
+    """Копирует PNG без текстовых и EXIF-фрагментов."""
+    if read_exactly(source, 8) != PNG_SIGNATURE:
+        raise ValueError('Нет подписи PNG.')
+    target.write(PNG_SIGNATURE)
+    while True:
+        header = read_exactly(source, 8)
+        length, kind = struct.unpack('>I4s', header)
+        if kind in PNG_METADATA_CHUNKS:
+            source.seek(length + 4, 1)
+            continue
+        target.write(header)
+        copy_rest(source, target, length + 4)
+        if kind == b'IEND':
+            return
+
+
+def reencode(source, target, image_format, max_side):
+    """Уменьшает изображение до max_side, декодируя JPEG сразу в меньшем
+    масштабе, и сохраняет без метаданных."""
+    image = Image.open(source)
+    if image_format == 'JPEG':
+        image.draft('RGB', (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_side, max_side), Image.LANCZOS, reducing_gap=3)
+    options = {'icc_profile': image.info.get('icc_profile')}
+    if image_format in ('JPEG', 'WEBP'):
+        options['quality'] = REENCODE_QUALITY
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L', 'CMYK'):
+        image = image.convert('RGB')
+    image.save(target, image_format, **options)
+
+
+def inspect_image(file):
+    """Формат, размеры и поворот по заголовку, без декодирования пикселей."""
+    file.seek(0)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', Image.DecompressionBombWarning)
+        try:
+            image = Image.open(file)
+        except (Image.DecompressionBombWarning, Image.DecompressionBombError):
+            raise ValidationError(
+                'Изображение слишком большое.', code='image_too_large'
+            )
+        except Exception:
+            raise ValidationError(
+                'Загрузите правильное изображение.', code='invalid_image'
+            )
+    if image.format not in ALLOWED_FORMATS:
+        raise ValidationError(
+            'Поддерживаются только JPEG, PNG, GIF и WebP.',
+            code='invalid_image_format'
+        )
+    width, height = image.size
+    frames = getattr(image, 'n_frames', 1)
+    if (
+        max(width, height) > settings.IMAGE_UPLOAD_MAX_SIDE
+        or width * height * frames > settings.IMAGE_UPLOAD_MAX_PIXELS
+    ):
+        raise ValidationError(
+            'Изображение слишком большое: не больше %(pixels)s '
+            'мегапикселей и %(side)s пикселей по стороне.',
+            code='image_too_large',
+            params={
+                'pixels': settings.IMAGE_UPLOAD_MAX_PIXELS // 10 ** 6,
+                'side': settings.IMAGE_UPLOAD_MAX_SIDE,
+            }
+        )
+    return image
+
+
+def check_upload(file):
+    """Отклоняет файлы сверх лимита по байтам и по размеру изображения."""
+    if (
+        getattr(file, 'too_large', False)
+        or file.size > settings.IMAGE_UPLOAD_MAX_BYTES
+    ):
+        raise ValidationError(
+            'Файл больше %(limit)s.',
+            code='file_too_large',
+            params={
+                'limit': filesizeformat(settings.IMAGE_UPLOAD_MAX_BYTES),
+            }
+        )
+    return inspect_image(file)
+
+
+def sanitize_upload(file, image):
+    """Копия загрузки без метаданных, уменьшенная до IMAGE_STORED_MAX_SIDE."""
+    orientation = image.getexif().get(ORIENTATION_TAG, 1)
+    oversize = max(image.size) > settings.IMAGE_STORED_MAX_SIDE
+    if image.format == 'GIF' or getattr(image, 'is_animated', False):
+        if oversize:
+            raise ValidationError(
+                'Анимированное изображение должно быть не больше '
+                '%(side)s пикселей по стороне.',
+                code='image_too_large',
+                params={'side': settings.IMAGE_STORED_MAX_SIDE}
+            )
+        return file
+    clean = TemporaryUploadedFile(
+        file.name, Image.MIME[image.format], 0, None
+    )
+    file.seek(0)
+    try:
+        if oversize or image.format == 'WEBP':
+            reencode(
+                file, clean, image.format, settings.IMAGE_STORED_MAX_SIDE
+            )
+        elif image.format == 'JPEG':
+            strip_jpeg(file, clean, orientation)
+        else:
+            strip_png(file, clean)
+    except (OSError, ValueError, struct.error, SyntaxError):
+        clean.close()
+        raise ValidationError(
+            'Загрузите правильное изображение.', code='invalid_image'
+        )
+    clean.size = clean.tell()
+    clean.seek(0)
+    return clean
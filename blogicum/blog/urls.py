@@ -10,6 +10,11 @@ urlpatterns = [
         views.PostListView.as_view(),
         name='index'
     ),
+    path(
+        'search/',
+        views.PostSearchView.as_view(),
+        name='search'
+    ),
     path(
         'posts/create/',
         views.PostCreateView.as_view(),
@@ -34,6 +39,11 @@ urlpatterns = [
         views.CategoryListView.as_view(),
         name='category_posts'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.CommentListView.as_view(),
+        name='comments'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.CommentCreateView.as_view(),
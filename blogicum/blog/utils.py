@@ -0,0 +1,17 @@
+from functools import wraps
+
+
+def request_cached(method):
+    """Выполняет метод представления не больше одного раза за запрос.
+
+    Результат хранится в самом запросе, поэтому повторные вызовы
+    с теми же аргументами не обращаются к базе данных.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        lookups = self.request.__dict__.setdefault('_blog_lookups', {})
+        key = (method.__qualname__, args, tuple(sorted(kwargs.items())))
+        if key not in lookups:
+            lookups[key] = method(self, *args, **kwargs)
+        return lookups[key]
+    return wrapper
@@ -1,69 +1,159 @@
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.urls import reverse, reverse_lazy
+from django.utils.http import urlencode
 from django.views.generic import (
     CreateView, DeleteView, DetailView, ListView, UpdateView
 )
 
-from .constants import MAX_DISPLAY_POSTS
+from .constants import MAX_DISPLAY_COMMENTS, MAX_DISPLAY_POSTS
 from .forms import CommentForm, PostForm, UserProfileForm
+from .lookups import categories
 from .models import Category, Post, User
-from .mixin import OnlyAuthorMixin, PostMixin, CommentMixin
+from .mixin import (
+    AnonymousPageCacheMixin,
+    CachedCountMixin,
+    CommentMixin,
+    ConditionalGetMixin,
+    CursorPaginationMixin,
+    OnlyAuthorMixin,
+    PostMixin,
+)
+from .paginators import CommentCursorPaginator, SearchCursorPaginator
+from .utils import request_cached
 
 
-class CategoryListView(ListView):
+class CategoryListView(
+    ConditionalGetMixin,
+    AnonymousPageCacheMixin,
+    CachedCountMixin,
+    CursorPaginationMixin,
+    ListView
+):
     model = Category
     template_name = 'blog/category.html'
     paginate_by = MAX_DISPLAY_POSTS
 
     def get_category(self):
-        return get_object_or_404(
-            Category,
+        category = categories.find(
             slug=self.kwargs['category_slug'],
             is_published=True
         )
+        if category is None:
+            raise Http404
+        return category
 
     def get_queryset(self):
         return self.get_category().posts.publish_filter()\
             .annotate_select_comments()
 
+    def get_count_cache_key(self):
+        return (*super().get_count_cache_key(), self.kwargs['category_slug'])
+
+    def get_publication_filters(self):
+        return {'category__slug': self.kwargs['category_slug']}
+
+    def get_page_cache_tags(self):
+        return (
+            *super().get_page_cache_tags(),
+            f"category:{self.kwargs['category_slug']}"
+        )
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['category'] = self.get_category()
         return context
 
 
-class PostListView(ListView):
+class PostListView(
+    ConditionalGetMixin,
+    AnonymousPageCacheMixin,
+    CachedCountMixin,
+    CursorPaginationMixin,
+    ListView
+):
     model = Post
     template_name = 'blog/index.html'
-    queryset = Post.objects.annotate_select_comments().publish_filter()
     paginate_by = MAX_DISPLAY_POSTS
 
+    def get_queryset(self):
+        return Post.objects.annotate_select_comments().publish_filter()
+
+    def get_page_cache_tags(self):
+        return (*super().get_page_cache_tags(), 'index')
+
+
+class PostSearchView(CursorPaginationMixin, ListView):
+    template_name = 'blog/search.html'
+    paginate_by = MAX_DISPLAY_POSTS
+    cursor_paginator_class = SearchCursorPaginator
+
+    def get_search_query(self):
+        return self.request.GET.get('q', '').strip()
+
+    def get_queryset(self):
+        return Post.objects.publish_filter().annotate_select_comments()\
+            .search(self.get_search_query())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.get_search_query()
+        context['page_query'] = f"{urlencode({'q': context['query']})}&"
+        return context
 
-class PostDetailView(DetailView):
+
+class PostDetailView(ConditionalGetMixin, DetailView):
     model = Post
     form_class = CommentForm
     template_name = 'blog/detail.html'
     pk_url_kwarg = 'post_id'
 
-    def get_object(self):
-        post = get_object_or_404(
-            Post,
-            pk=self.kwargs[self.pk_url_kwarg],
+    def get_page_cache_tags(self):
+        return (
+            *super().get_page_cache_tags(),
+            f'post:{self.kwargs[self.pk_url_kwarg]}'
         )
-        if post.author == self.request.user:
-            return post
+
+    def get_object(self):
         return get_object_or_404(
-            Post.objects.publish_filter(
-            ), pk=self.kwargs[self.pk_url_kwarg]
+            Post.objects.visible_to(self.request.user).select_related(
+                'author'
+            ).with_lookups(),
+            pk=self.kwargs[self.pk_url_kwarg]
         )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['post'] = self.object
         context['form'] = CommentForm()
-        context['comments'] = self.object.comments.select_related('post')
+        context['comments'] = CommentCursorPaginator(
+            self.object.comments.select_related('author'),
+            MAX_DISPLAY_COMMENTS
+        ).page()
+        return context
+
+
+class CommentListView(CursorPaginationMixin, ListView):
+    template_name = 'includes/comment_list.html'
+    paginate_by = MAX_DISPLAY_COMMENTS
+    cursor_paginator_class = CommentCursorPaginator
+
+    @request_cached
+    def get_post(self):
+        return get_object_or_404(
+            Post.objects.visible_to(self.request.user),
+            pk=self.kwargs['post_id']
+        )
+
+    def get_queryset(self):
+        return self.get_post().comments.select_related('author')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['post'] = self.get_post()
+        context['comments'] = context['page_obj']
         return context
 
 
@@ -115,11 +205,18 @@ class CommentDeleteView(CommentMixin, OnlyAuthorMixin, DeleteView):
     pass
 
 
-class ProfileDetailView(ListView):
+class ProfileDetailView(
+    ConditionalGetMixin,
+    AnonymousPageCacheMixin,
+    CachedCountMixin,
+    CursorPaginationMixin,
+    ListView
+):
     model = Post
     template_name = 'blog/profile.html'
     paginate_by = MAX_DISPLAY_POSTS
 
+    @request_cached
     def get_profile(self):
         return get_object_or_404(
             User,
@@ -132,6 +229,22 @@ class ProfileDetailView(ListView):
             queryset = queryset.publish_filter()
         return queryset
 
+    def get_count_cache_key(self):
+        return (
+            *super().get_count_cache_key(),
+            self.kwargs['username'],
+            self.get_profile() == self.request.user
+        )
+
+    def get_publication_filters(self):
+        return {'author__username': self.kwargs['username']}
+
+    def get_page_cache_tags(self):
+        return (
+            *super().get_page_cache_tags(),
+            f"profile:{self.kwargs['username']}"
+        )
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['profile'] = self.get_profile()
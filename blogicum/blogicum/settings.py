@@ -59,9 +59,19 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 60,
     }
 }
 
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64 * 1024,
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -101,6 +111,27 @@ CSRF_FAILURE_VIEW = 'pages.views.csrf_failure'
 
 MEDIA_ROOT = BASE_DIR / 'media'
 
+MEDIA_URL = '/media/'
+
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24
+
+FILE_UPLOAD_HANDLERS = ['blog.uploads.LimitedUploadHandler']
+
+IMAGE_UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+
+IMAGE_UPLOAD_MAX_PIXELS = 40 * 10 ** 6
+
+IMAGE_UPLOAD_MAX_SIDE = 12000
+
+# Изображения крупнее уменьшаются при загрузке.
+IMAGE_STORED_MAX_SIDE = 4096
+
+# 'X-Sendfile' (Apache, lighttpd) или 'X-Accel-Redirect' (nginx): файлы
+# отдаёт прокси, а Django только проверяет запрос.
+MEDIA_SENDFILE_HEADER = None
+
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
@@ -108,3 +139,56 @@ EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 LOGIN_REDIRECT_URL = 'blog:index'
 
 LOGIN_URL = 'login'
+
+POST_COUNT_CACHE_TIMEOUT = 300
+
+POST_COUNT_ESTIMATE_THRESHOLD = None
+
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+PAGE_CACHE_TIMEOUT = 60 * 5
+
+CACHES = {
+    'default': {
+        'BACKEND': 'blog.cache_backends.TieredCache',
+        'LOCATION': BASE_DIR / 'cache.sqlite3',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'LOCAL_MAX_BYTES': 32 * 1024 * 1024,
+            'LOCAL_MAX_ENTRIES': 10000,
+            'LOCAL_TIMEOUT': 5,
+            'LOCK_TIMEOUT': 10,
+        },
+    },
+    # Сессии и пользователи сессий читаются только из общего уровня,
+    # чтобы выход и смена пароля сразу действовали во всех процессах.
+    # Отдельный файл: вытеснение страниц не выбрасывает сессии.
+    'sessions': {
+        'BACKEND': 'blog.cache_backends.TieredCache',
+        'LOCATION': BASE_DIR / 'sessions.sqlite3',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'LOCAL_TIMEOUT': 0,
+        },
+    },
+}
+
+SESSION_ENGINE = 'blog.sessions'
+
+SESSION_CACHE_ALIAS = 'sessions'
+
+SESSION_SAVE_EVERY_REQUEST = True
+
+AUTHENTICATION_BACKENDS = ['blog.backends.CachedModelBackend']
+
+AUTH_USER_CACHE_TIMEOUT = 60 * 15
+
+JOB_MAX_ATTEMPTS = 5
+
+JOB_RETRY_DELAY = 30
+
+JOB_LOCK_TIMEOUT = 60 * 10
+
+JOB_KEEP_FINISHED = 60 * 60 * 24
@@ -1,8 +1,8 @@
 from django.contrib import admin
 from django.urls import include, path
-from django.conf.urls.static import static
 from django.conf import settings
 
+from blog.media import serve_media
 from blog.views import RegistrationCreate
 
 
@@ -16,7 +16,12 @@ urlpatterns = [
         RegistrationCreate.as_view(),
         name='registration',
     ),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path(
+        f'{settings.MEDIA_URL.lstrip("/")}<path:path>',
+        serve_media,
+        name='media',
+    ),
+]
 
 handler404 = 'pages.views.page_not_found'
 handler500 = 'pages.views.server_error'
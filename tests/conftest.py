@@ -18,7 +18,9 @@ from typing import (
 
 import pytest
 from django.apps import apps
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
@@ -26,6 +28,8 @@ from django.test import override_settings
 from django.test.client import Client
 from mixer.backend.django import mixer as _mixer
 
+from blog.cache import flush_stats
+
 N_PER_FIXTURE = 3
 N_PER_PAGE = 10
 COMMENT_TEXT_DISPLAY_LEN_FOR_TESTS = 50
@@ -41,6 +45,33 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True, scope="session")
+def cache_location(tmp_path_factory):
+    """Кеш и сессии тестов хранятся во временном файле, а не в проекте."""
+    location = tmp_path_factory.mktemp("cache")
+    caches = {
+        alias: {**config, "LOCATION": location / f"{alias}.sqlite3"}
+        for alias, config in settings.CACHES.items()
+    }
+    with override_settings(CACHES=caches):
+        yield location
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    flush_stats()
+    cache.clear()
+    yield
+    flush_stats()
+    cache.clear()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -0,0 +1,169 @@
+import time
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.cache import (
+    get_page_tag_versions,
+    get_stats,
+    invalidate_page_tags,
+)
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_cards_are_cached(
+        user_client, user, many_posts_with_published_locations
+):
+    user_client.get("/")
+    assert get_stats("post_card") == {
+        "hits": 0, "misses": 10, "ratio": 0
+    }
+    user_client.get("/")
+    assert get_stats("post_card")["hits"] == 10, (
+        "Убедитесь, что карточки публикаций берутся из кеша."
+    )
+
+    user.username = "renamed_author"
+    user.save()
+    content = user_client.get("/").content.decode("utf-8")
+    assert "@renamed_author" in content, (
+        "Убедитесь, что карточки обновляются после смены имени автора."
+    )
+    assert get_stats("post_card")["misses"] == 20
+
+
+def test_post_card_follows_category_and_location(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    user_client.get("/")
+    post.category.title = "Новое название"
+    post.category.save()
+    post.location.name = "Новое место"
+    post.location.save()
+    content = user_client.get("/").content.decode("utf-8")
+    assert "Новое название" in content
+    assert "Новое место" in content
+
+
+def test_cache_hits_do_not_write_to_cache(
+        client, monkeypatch, post_with_published_location
+):
+    client.get("/")
+    writes = []
+
+    def recording(name, method):
+        def wrapper(*args, **kwargs):
+            writes.append(name)
+            return method(*args, **kwargs)
+        return wrapper
+
+    for name in ("add", "incr", "set", "set_many"):
+        monkeypatch.setattr(
+            cache, name, recording(name, getattr(cache, name))
+        )
+    for _ in range(3):
+        assert client.get("/").status_code == 200
+    assert not writes, (
+        "Убедитесь, что попадание в кеш страниц не пишет статистику"
+        " в общий кеш на каждом запросе."
+    )
+    assert get_stats("page")["hits"] == 3
+
+
+def test_cache_stats_command(user_client, capsys, post_with_published_location):
+    user_client.get("/")
+    user_client.get("/")
+    call_command("cache_stats")
+    assert "доля попаданий 50.0%" in capsys.readouterr().out
+
+
+def _page_urls(post):
+    return (
+        "/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+    )
+
+
+def test_anonymous_pages_served_without_queries(
+        client, django_assert_num_queries, post_with_published_location
+):
+    for url in _page_urls(post_with_published_location):
+        assert client.get(url).status_code == 200
+        with django_assert_num_queries(0):
+            response = client.get(url)
+        assert response.status_code == 200
+        assert post_with_published_location.title in (
+            response.content.decode("utf-8")
+        )
+
+
+def test_page_cache_ignores_unknown_params(
+        client, django_assert_num_queries, post_with_published_location
+):
+    client.get("/")
+    with django_assert_num_queries(0):
+        for number in range(3):
+            assert client.get(f"/?x={number}").status_code == 200, (
+                "Убедитесь, что параметры, которые не меняют страницу, не"
+                " создают новых записей в кеше."
+            )
+    with django_assert_num_queries(1, exact=False):
+        client.get("/?page=2")
+
+
+def test_logged_in_users_bypass_page_cache(
+        user_client, post_with_published_location
+):
+    user_client.get("/")
+    with CaptureQueriesContext(connection) as ctx:
+        user_client.get("/")
+    assert ctx.captured_queries, (
+        "Убедитесь, что авторизованным пользователям кешированная страница"
+        " не отдаётся."
+    )
+
+
+def test_page_cache_invalidation(
+        client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    urls = _page_urls(post)
+    for url in urls:
+        client.get(url)
+
+    mixer.blend("blog.Comment", post=post)
+    for url in urls:
+        assert "Комментарии (0)" in client.get(url).content.decode("utf-8"), (
+            "Убедитесь, что комментарий не сбрасывает кеш страниц списков."
+        )
+
+    post.location.is_published = False
+    post.location.save()
+    for url in urls:
+        assert post.location.name not in (
+            client.get(url).content.decode("utf-8")
+        )
+
+    post.category.is_published = False
+    post.category.save()
+    assert client.get(urls[1]).status_code == 404
+    assert post.title not in client.get(urls[0]).content.decode("utf-8")
+
+
+def test_untouched_page_tags_expire(settings, monkeypatch):
+    settings.PAGE_CACHE_TIMEOUT = 60
+    [version] = get_page_tag_versions(("profile:nobody",))
+    invalidate_page_tags("index")
+    [changed] = get_page_tag_versions(("index",))
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert get_page_tag_versions(("profile:nobody",)) != [version], (
+        "Убедитесь, что чтение версии тега не оставляет в кеше вечных ключей."
+    )
+    assert get_page_tag_versions(("index",)) == [changed]
@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+from django.core.management import call_command
+
+from blog.cache_backends import TieredCache
+
+
+@pytest.fixture
+def tiered_cache(tmp_path):
+    cache = TieredCache(tmp_path / "cache.sqlite3", {
+        "OPTIONS": {
+            "LOCAL_MAX_BYTES": 2048,
+            "LOCAL_MAX_ENTRIES": 100,
+            "LOCAL_TIMEOUT": 60,
+        },
+    })
+    yield cache
+    cache.clear()
+
+
+def test_local_tier_evicts_by_size(tiered_cache):
+    for number in range(10):
+        tiered_cache.set(f"key-{number}", "x" * 500)
+    assert tiered_cache.local.size <= 2048
+    assert tiered_cache.get_stats()["evictions"] >= 6, (
+        "Убедитесь, что уровень процесса вытесняет записи по объёму."
+    )
+    assert tiered_cache.get("key-0") == "x" * 500, (
+        "Убедитесь, что вытесненные из процесса записи читаются из общего"
+        " уровня."
+    )
+    stats = tiered_cache.get_stats()
+    assert stats["shared_hits"] == 1
+
+
+def test_expired_values_are_missing(tiered_cache):
+    tiered_cache.set("expired", 1, timeout=0)
+    tiered_cache.set("forever", 2, timeout=None)
+    assert tiered_cache.get("expired") is None
+    assert tiered_cache.add("expired", 3)
+    assert not tiered_cache.add("forever", 4)
+    assert tiered_cache.incr("forever", 5) == 7
+    assert tiered_cache.get_many(["expired", "forever", "none"]) == {
+        "expired": 3, "forever": 7,
+    }
+
+
+def test_get_or_set_computes_once(tiered_cache):
+    calls = []
+    results = []
+    barrier = threading.Barrier(8)
+
+    def rebuild():
+        calls.append(1)
+        time.sleep(0.2)
+        return "страница"
+
+    def request():
+        barrier.wait()
+        results.append(tiered_cache.get_or_set("feed", rebuild))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["страница"] * 8
+    assert len(calls) == 1, (
+        "Убедитесь, что одновременные промахи пересчитывают значение"
+        " один раз."
+    )
+    assert tiered_cache.get_stats()["coalesced"] == 7
+
+
+def test_get_or_set_does_not_block_other_keys(tiered_cache):
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "медленно"
+
+    thread = threading.Thread(
+        target=tiered_cache.get_or_set, args=("slow", slow)
+    )
+    thread.start()
+    started.wait(5)
+    try:
+        for number in range(100):
+            assert tiered_cache.get_or_set(
+                f"fast-{number}", lambda: number
+            ) == number
+        assert thread.is_alive(), (
+            "Убедитесь, что пересчёт одного ключа не задерживает другие."
+        )
+    finally:
+        release.set()
+        thread.join()
+    assert tiered_cache.get("slow") == "медленно"
+    assert not tiered_cache.key_locks.locks
+
+
+@pytest.mark.django_db
+def test_cache_stats_command_shows_tiers(client, capsys):
+    client.get("/")
+    client.get("/")
+    call_command("cache_stats")
+    assert "попаданий в процессе" in capsys.readouterr().out
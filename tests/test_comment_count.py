@@ -0,0 +1,102 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, transaction
+from django.db.models.signals import pre_delete
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_views(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    for text in ("Первый", "Второй"):
+        user_client.post(f"/posts/{post.id}/comment/", data={"text": text})
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что при добавлении комментария увеличивается счётчик"
+        " комментариев публикации."
+    )
+
+    comment = post.comments.first()
+    user_client.post(
+        f"/posts/{post.id}/comment/delete_comment/{comment.id}"
+    )
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        "Убедитесь, что при удалении комментария уменьшается счётчик"
+        " комментариев публикации."
+    )
+
+
+def test_comment_count_follows_bulk_and_cascade_deletes(
+        mixer, another_user, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post)
+    mixer.cycle(2).blend("blog.Comment", post=post, author=another_user)
+
+    post.comments.filter(author=another_user).delete()
+    post.refresh_from_db()
+    assert post.comment_count == 3
+
+    post.comments.first().author.delete()
+    post.refresh_from_db()
+    assert post.comment_count == 2
+
+
+def test_post_delete_cost_does_not_grow_with_comments(
+        mixer, django_assert_max_num_queries, user, published_category
+):
+    queries = []
+    for count in (1, 50):
+        post = mixer.blend(
+            "blog.Post", author=user, category=published_category
+        )
+        mixer.cycle(count).blend("blog.Comment", post=post)
+        with django_assert_max_num_queries(15) as context:
+            post.delete()
+        queries.append(len(context.captured_queries))
+    assert queries[0] == queries[1], (
+        "Убедитесь, что при удалении публикации её комментарии не "
+        "пересчитываются по одному."
+    )
+
+
+def test_failed_post_delete_keeps_comment_counting(
+        mixer, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+
+    def fail(**kwargs):
+        raise IntegrityError("Удаление не удалось.")
+
+    pre_delete.connect(fail, sender=Post, dispatch_uid="fail_post_delete")
+    try:
+        with pytest.raises(IntegrityError), transaction.atomic():
+            post.delete()
+    finally:
+        pre_delete.disconnect(sender=Post, dispatch_uid="fail_post_delete")
+    post.comments.first().delete()
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        "Убедитесь, что после неудачного удаления публикации удаление"
+        " комментария по-прежнему уменьшает счётчик."
+    )
+
+
+def test_recount_comments_command(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    type(post).objects.filter(pk=post.pk).update(comment_count=10)
+
+    with pytest.raises(CommandError):
+        call_command("recount_comments", "--check")
+    call_command("recount_comments")
+    call_command("recount_comments", "--check")
+    post.refresh_from_db()
+    assert post.comment_count == 2
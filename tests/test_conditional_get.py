@@ -0,0 +1,111 @@
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _urls(post):
+    return (
+        "/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+        f"/posts/{post.id}/",
+    )
+
+
+def test_unchanged_pages_answer_not_modified(
+        client, django_assert_max_num_queries, post_with_published_location
+):
+    for url in _urls(post_with_published_location):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.has_header("ETag")
+        assert response.has_header("Last-Modified")
+
+        with django_assert_max_num_queries(1):
+            not_modified = client.get(
+                url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        assert not_modified.status_code == 304, (
+            "Убедитесь, что на `If-None-Match` с актуальным ETag страница"
+            " отвечает 304."
+        )
+        with django_assert_max_num_queries(1):
+            not_modified = client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+            )
+        assert not_modified.status_code == 304, (
+            "Убедитесь, что на `If-Modified-Since` страница отвечает 304,"
+            " если она не менялась."
+        )
+
+
+def test_new_comment_changes_validators(
+        client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    *list_urls, detail_url = _urls(post)
+    etags = {url: client.get(url)["ETag"] for url in _urls(post)}
+    mixer.blend("blog.Comment", post=post)
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etags[detail_url])
+    assert response.status_code == 200, (
+        "Убедитесь, что после добавления комментария страница публикации"
+        " отдаётся заново."
+    )
+    assert response["ETag"] != etags[detail_url]
+    for url in list_urls:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+        assert response.status_code == 304, (
+            "Убедитесь, что комментарий не сбрасывает страницы списков."
+        )
+
+
+def test_logged_in_not_modified_skips_blog_queries(
+        user_client, post_with_published_location
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    # Первый ответ выдаёт cookie CSRF, от которой зависит ETag.
+    user_client.get(url)
+    etag = user_client.get(url)["ETag"]
+    assert etag
+    with CaptureQueriesContext(connection) as ctx:
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert not any("blog_" in query["sql"] for query in ctx.captured_queries)
+
+
+def test_relogin_invalidates_page_with_csrf_token(
+        user, post_with_published_location
+):
+    user.set_password("password")
+    user.save()
+    client = Client(enforce_csrf_checks=True)
+
+    def log_in():
+        client.get("/auth/login/")
+        client.post("/auth/login/", {
+            "username": user.username,
+            "password": "password",
+            "csrfmiddlewaretoken": client.cookies["csrftoken"].value,
+        })
+
+    url = f"/posts/{post_with_published_location.id}/"
+    log_in()
+    etag = client.get(url)["ETag"]
+    client.post("/auth/logout/", {
+        "csrfmiddlewaretoken": client.cookies["csrftoken"].value,
+    })
+    log_in()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Убедитесь, что после повторного входа страница с формой "
+        "отдаётся заново, а не ответом 304 со старым CSRF-токеном."
+    )
+    token = response.context["csrf_token"]
+    response = client.post(
+        f"/posts/{post_with_published_location.id}/comment/",
+        {"text": "Комментарий", "csrfmiddlewaretoken": str(token)},
+    )
+    assert response.status_code == 302
@@ -0,0 +1,158 @@
+from io import BytesIO
+
+import pytest
+from django.contrib.admin.sites import site
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog.images import available_formats
+from blog.models import Post
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures("media_root"),
+]
+
+
+def run_jobs():
+    call_command("run_workers", "--once", "--workers", "1")
+
+
+def make_image(size, name="large.jpg"):
+    img_io = BytesIO()
+    Image.new("RGB", size, color=(73, 109, 137)).save(img_io, format="JPEG")
+    return ImageFile(img_io, name=name)
+
+
+@pytest.fixture
+def pending_post(mixer, user, published_location, published_category):
+    return mixer.blend(
+        "blog.Post",
+        location=published_location,
+        category=published_category,
+        author=user,
+        image=make_image((1400, 700)),
+    )
+
+
+@pytest.fixture
+def post_with_large_image(pending_post):
+    run_jobs()
+    return pending_post
+
+
+def test_original_shown_while_pending(client, pending_post):
+    post = Post.objects.get(pk=pending_post.pk)
+    assert post.image_variants == {
+        "source": post.image.name, "pending": True
+    }, "Убедитесь, что копии изображения готовятся не в запросе."
+    content = client.get("/").content.decode()
+    assert f'src="{post.image.url}"' in content
+    assert "srcset" not in content
+
+
+def test_variants_created_on_save(post_with_large_image, media_root):
+    post = Post.objects.get(pk=post_with_large_image.pk)
+    variants = post.image_variants
+    assert variants["source"] == post.image.name
+    assert (variants["width"], variants["height"]) == (1400, 700)
+    assert [entry["width"] for entry in variants["card"]] == [320, 640, 1280]
+    for entry in variants["card"] + variants["detail"]:
+        assert entry["height"] * 2 == entry["width"], (
+            "Убедитесь, что уменьшенные копии сохраняют пропорции."
+        )
+        with Image.open(media_root / entry["name"]) as image:
+            assert image.size == (entry["width"], entry["height"])
+
+
+def test_small_image_not_upscaled(post_with_published_location):
+    run_jobs()
+    variants = Post.objects.get(
+        pk=post_with_published_location.pk
+    ).image_variants
+    assert [entry["width"] for entry in variants["card"]] == [100], (
+        "Убедитесь, что изображение не увеличивается при создании копий."
+    )
+
+
+def test_card_uses_responsive_image(client, post_with_large_image):
+    content = client.get("/").content.decode()
+    assert 'srcset="' in content and " 1280w" in content, (
+        "Убедитесь, что в карточке публикации выводится `srcset`."
+    )
+    assert 'width="640" height="320"' in content
+    assert 'loading="lazy"' in content
+
+
+def test_detail_image_not_lazy(client, post_with_large_image):
+    content = client.get(f"/posts/{post_with_large_image.pk}/").content
+    assert b" 1280w" in content
+    assert b'loading="lazy"' not in content, (
+        "Убедитесь, что главное изображение страницы публикации "
+        "не загружается лениво."
+    )
+
+
+def test_backfill_command(post_with_large_image, capsys, media_root):
+    Post.objects.filter(pk=post_with_large_image.pk).update(image_variants={})
+    call_command("generate_image_variants")
+    assert "Обновлено публикаций: 1" in capsys.readouterr().out
+    post = Post.objects.get(pk=post_with_large_image.pk)
+    assert post.image_variants["source"] == post.image.name
+    call_command("generate_image_variants")
+    assert "Обновлено публикаций: 0" in capsys.readouterr().out
+
+
+def test_admin_preview(post_with_large_image):
+    post = Post.objects.get(pk=post_with_large_image.pk)
+    html = site._registry[Post].post_photo(post)
+    assert 'width="80" height="40"' in html and " 160w" in html
+
+
+@pytest.mark.skipif(
+    not available_formats(), reason="Pillow собран без WebP и AVIF"
+)
+def test_card_offers_modern_formats(client, post_with_large_image):
+    content = client.get("/").content.decode()
+    for fmt in available_formats():
+        assert f'<source type="image/{fmt}"' in content, (
+            "Убедитесь, что карточка предлагает копии в современных форматах."
+        )
+
+
+@pytest.mark.skipif(
+    not available_formats(), reason="Pillow собран без WebP и AVIF"
+)
+def test_media_negotiates_by_accept(client, post_with_large_image):
+    fmt = available_formats()[0]
+    url = post_with_large_image.image.url
+    response = client.get(url, HTTP_ACCEPT=f"image/{fmt},image/*;q=0.8")
+    assert response["Content-Type"] == f"image/{fmt}", (
+        "Убедитесь, что браузеру с поддержкой современных форматов "
+        "отдаётся изображение в таком формате."
+    )
+    assert "Accept" in response["Vary"]
+    response = client.get(url, HTTP_ACCEPT="image/*")
+    assert response["Content-Type"] == "image/jpeg"
+    assert "Accept" in response["Vary"]
+
+
+@pytest.mark.skipif(
+    not available_formats(), reason="Pillow собран без WebP и AVIF"
+)
+def test_original_immutable_only_when_not_replaceable(client, pending_post):
+    fmt = available_formats()[0]
+    url = pending_post.image.url
+    modern = f"image/{fmt},image/*;q=0.8"
+    response = client.get(url, HTTP_ACCEPT=modern)
+    assert "immutable" not in response["Cache-Control"], (
+        "Убедитесь, что оригинал не кешируется навсегда, пока у него нет "
+        "копий в современных форматах."
+    )
+    run_jobs()
+    response = client.get(url, HTTP_ACCEPT=modern)
+    assert response["Content-Type"] == f"image/{fmt}"
+    assert "immutable" in response["Cache-Control"]
+    response = client.get(url, HTTP_ACCEPT="image/*")
+    assert "immutable" not in response["Cache-Control"]
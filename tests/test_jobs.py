@@ -0,0 +1,45 @@
+import pytest
+from django.core.management import call_command
+
+from blog.jobs import claim, enqueue, job_stats, run_job
+from blog.models import Job
+
+pytestmark = [pytest.mark.django_db]
+
+
+def failing_task(**kwargs):
+    raise RuntimeError("сбой")
+
+
+def test_failed_job_retried_then_dead(settings):
+    settings.JOB_MAX_ATTEMPTS = 2
+    settings.JOB_RETRY_DELAY = 0
+    job = enqueue("tests.test_jobs.failing_task", value=1)
+    (claimed,) = claim("test", 10)
+    assert run_job(claimed) == Job.Status.PENDING
+    job.refresh_from_db()
+    assert job.attempts == 1 and "сбой" in job.last_error
+    Job.objects.filter(pk=job.pk).update(status=Job.Status.PENDING)
+    call_command("run_workers", "--once", "--workers", "1")
+    job.refresh_from_db()
+    assert job.status == Job.Status.DEAD, (
+        "Убедитесь, что задача после всех попыток помечается невыполненной."
+    )
+    assert job_stats()[Job.Status.DEAD] == 1
+
+
+def test_claimed_job_not_taken_twice():
+    enqueue("tests.test_jobs.failing_task")
+    assert len(claim("first", 10)) == 1
+    assert claim("second", 10) == [], (
+        "Убедитесь, что задачу не забирают два обработчика сразу."
+    )
+
+
+def test_run_workers_reports_throughput(capsys):
+    for _ in range(3):
+        enqueue("django.utils.timezone.now")
+    call_command("run_workers", "--once", "--workers", "1")
+    out = capsys.readouterr().out
+    assert "Выполнено задач: 3" in out
+    assert "ожидают 0" in out and "выполнены 3" in out
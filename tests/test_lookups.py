@@ -0,0 +1,75 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.forms import PostForm
+from blog.lookups import TableCache, categories
+from blog.models import Category
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _lookup_queries(ctx):
+    return [
+        query["sql"] for query in ctx.captured_queries
+        if 'FROM "blog_category"' in query["sql"]
+        or 'FROM "blog_location"' in query["sql"]
+        or 'JOIN "blog_location"' in query["sql"]
+    ]
+
+
+def test_pages_and_form_resolve_lookups_from_memory(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    post.location.name = "Место"
+    post.location.save()
+    urls = (
+        "/",
+        f"/category/{post.category.slug}/",
+        f"/posts/{post.id}/",
+        "/posts/create/",
+    )
+    for url in urls:
+        user_client.get(url)
+    with CaptureQueriesContext(connection) as ctx:
+        for url in urls:
+            content = user_client.get(url).content.decode("utf-8")
+            assert post.location.name in content
+    assert not _lookup_queries(ctx), (
+        "Убедитесь, что категории и местоположения берутся из кеша процесса,"
+        " а не запрашиваются из базы на каждой странице."
+    )
+
+
+def test_lookup_cache_follows_changes(
+        user_client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    user_client.get("/")
+    post.category.title = "Переименованная категория"
+    post.category.save()
+    assert "Переименованная категория" in (
+        user_client.get("/").content.decode("utf-8")
+    )
+
+    new_category = mixer.blend("blog.Category", is_published=True)
+    form = PostForm()
+    assert (new_category.id, str(new_category)) in [
+        (choice[0].value, choice[1])
+        for choice in form.fields["category"].choices
+        if choice[0]
+    ], "Убедитесь, что новая категория сразу появляется в форме публикации."
+
+
+def test_lookup_version_is_shared_between_workers(published_category):
+    other_worker = TableCache("blog.Category")
+    assert other_worker.get(published_category.id).title == (
+        published_category.title
+    )
+    Category.objects.filter(pk=published_category.pk).update(title="Новое")
+    categories.invalidate()
+    assert other_worker.get(published_category.id).title == "Новое", (
+        "Убедитесь, что кеш таблицы перечитывается после смены версии в"
+        " общем кеше."
+    )
@@ -0,0 +1,84 @@
+import os
+from io import BytesIO
+
+import pytest
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog.models import MediaFile, Post
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures("media_root"),
+]
+
+
+def make_image(name, color=(73, 109, 137)):
+    img_io = BytesIO()
+    Image.new("RGB", (400, 300), color=color).save(img_io, format="JPEG")
+    return ImageFile(img_io, name=name)
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category):
+    def make_post(image):
+        return mixer.blend(
+            "blog.Post",
+            author=user,
+            category=published_category,
+            image=image,
+        )
+    return make_post
+
+
+def test_same_image_stored_once(make_post, media_root):
+    first = make_post(make_image("first.jpg"))
+    second = make_post(make_image("second.JPG"))
+    assert first.image.name == second.image.name, (
+        "Убедитесь, что одинаковые изображения хранятся в одном файле."
+    )
+    assert first.image.name.startswith("post_images/")
+    assert len(list((media_root / "post_images").rglob("*.jpg"))) == 1
+    assert MediaFile.objects.get(name=first.image.name).references == 2
+
+
+def test_file_removed_with_last_reference(
+        make_post, media_root, django_capture_on_commit_callbacks
+):
+    first = make_post(make_image("first.jpg"))
+    second = make_post(make_image("second.jpg"))
+    call_command("run_workers", "--once", "--workers", "1")
+    path = media_root / first.image.name
+    variant = media_root / Post.objects.get(
+        pk=first.pk
+    ).image_variants["card"][0]["name"]
+    with django_capture_on_commit_callbacks(execute=True):
+        Post.objects.get(pk=first.pk).delete()
+    assert path.exists() and variant.exists(), (
+        "Убедитесь, что файл не удаляется, пока на него есть ссылки."
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        post = Post.objects.get(pk=second.pk)
+        post.image = make_image("other.jpg", color=(10, 20, 30))
+        post.save()
+    assert not path.exists() and not variant.exists(), (
+        "Убедитесь, что файл и его копии удаляются вместе с последней "
+        "ссылкой на них."
+    )
+    assert not MediaFile.objects.filter(name=first.image.name).exists()
+
+
+def test_gc_media_removes_orphans(make_post, media_root, capsys):
+    post = make_post(make_image("kept.jpg"))
+    orphan = media_root / "post_images" / "orphan.jpg"
+    orphan.write_bytes(b"x")
+    os.utime(orphan, (0, 0))
+    MediaFile.objects.all().delete()
+    call_command("gc_media", "--min-age", "60")
+    assert "Удалено: 1" in capsys.readouterr().out
+    assert not orphan.exists()
+    assert (media_root / post.image.name).exists()
+    assert MediaFile.objects.get(name=post.image.name).references == 1, (
+        "Убедитесь, что gc_media восстанавливает счётчики ссылок."
+    )
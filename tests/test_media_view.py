@@ -0,0 +1,96 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+CONTENT = bytes(range(256)) * 1024
+
+
+@pytest.fixture(autouse=True)
+def media_file(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "file.bin").write_bytes(CONTENT)
+    (tmp_path / "docs" / ".upload-tmp").write_bytes(b"x")
+    return "/media/docs/file.bin"
+
+
+def read(response):
+    return b"".join(response.streaming_content)
+
+
+def test_full_file_streamed(client, media_file):
+    response = client.get(media_file)
+    assert response.status_code == 200
+    assert response.streaming, "Убедитесь, что файл отдаётся частями."
+    assert read(response) == CONTENT
+    assert response["Content-Length"] == str(len(CONTENT))
+    assert response["Accept-Ranges"] == "bytes"
+    assert response["ETag"].startswith('"'), (
+        "Убедитесь, что у файла сильный ETag."
+    )
+
+
+@pytest.mark.parametrize("header, first, last", [
+    ("bytes=100-199", 100, 199),
+    ("bytes=-10", len(CONTENT) - 10, len(CONTENT) - 1),
+    ("bytes=262000-", 262000, len(CONTENT) - 1),
+])
+def test_byte_range(client, media_file, header, first, last):
+    response = client.get(media_file, HTTP_RANGE=header)
+    assert response.status_code == 206
+    assert read(response) == CONTENT[first:last + 1]
+    assert response["Content-Range"] == f"bytes {first}-{last}/{len(CONTENT)}"
+    assert response["Content-Length"] == str(last - first + 1)
+
+
+def test_range_not_satisfiable(client, media_file):
+    response = client.get(media_file, HTTP_RANGE=f"bytes={len(CONTENT)}-")
+    assert response.status_code == 416
+    assert response["Content-Range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_conditional_requests(client, media_file):
+    response = client.get(media_file)
+    etag, last_modified = response["ETag"], response["Last-Modified"]
+    assert client.get(
+        media_file, HTTP_IF_NONE_MATCH=etag
+    ).status_code == 304
+    assert client.get(
+        media_file, HTTP_IF_MODIFIED_SINCE=last_modified
+    ).status_code == 304
+    assert client.get(
+        media_file, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"'
+    ).status_code == 200, (
+        "Убедитесь, что при устаревшем If-Range отдаётся весь файл."
+    )
+
+
+def test_hidden_and_outside_files(client):
+    assert client.get("/media/docs/.upload-tmp").status_code == 404
+    assert client.get("/media/docs/../../etc/passwd").status_code == 404
+    assert client.get("/media/docs/").status_code == 404
+
+
+def test_outside_files_not_negotiated(client, monkeypatch):
+    checked = []
+    monkeypatch.setattr(
+        "blog.media.default_storage.exists",
+        lambda name: checked.append(name) or False,
+    )
+    for url in ("/media/docs/../../image.jpg", "/media/.hidden/image.jpg"):
+        response = client.get(url, HTTP_ACCEPT="image/avif,image/webp")
+        assert response.status_code == 404
+    assert not checked, (
+        "Убедитесь, что копии в других форматах ищутся только для"
+        " проверенного имени файла."
+    )
+
+
+def test_accel_redirect(client, media_file, settings):
+    settings.MEDIA_SENDFILE_HEADER = "X-Accel-Redirect"
+    response = client.get(media_file)
+    assert response.status_code == 200
+    assert response["X-Accel-Redirect"] == "/protected-media/docs/file.bin"
+    assert response.content == b"", (
+        "Убедитесь, что при отдаче через прокси тело ответа пустое."
+    )
@@ -0,0 +1,107 @@
+import re
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _cursor_from(content: str, direction: str) -> str:
+    match = re.search(rf'\?{direction}=([\w-]+)', content)
+    assert match, (
+        f"Убедитесь, что в пагинаторе есть ссылка с параметром `{direction}`."
+    )
+    return match.group(1)
+
+
+def test_cursor_pagination_walks_feed(
+        user_client, mixer, user, published_category
+):
+    pub_date = timezone.now() - timezone.timedelta(days=1)
+    posts = mixer.cycle(N_PER_PAGE * 2 + 3).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        pub_date=pub_date,
+    )
+    expected_ids = sorted((post.id for post in posts), reverse=True)
+
+    seen_ids = []
+    url = "/"
+    while True:
+        response = user_client.get(url)
+        assert response.status_code == 200
+        seen_ids.extend(post.id for post in response.context["page_obj"])
+        if not response.context["page_obj"].has_next():
+            break
+        content = response.content.decode("utf-8")
+        url = f"/?after={_cursor_from(content, 'after')}"
+
+    assert seen_ids == expected_ids, (
+        "Убедитесь, что курсорная пагинация выводит все публикации ровно"
+        " один раз, «от новых к старым»."
+    )
+
+    response = user_client.get(url)
+    content = response.content.decode("utf-8")
+    previous = user_client.get(f"/?before={_cursor_from(content, 'before')}")
+    assert [post.id for post in previous.context["page_obj"]] == (
+        expected_ids[N_PER_PAGE:N_PER_PAGE * 2]
+    ), "Убедитесь, что ссылка на предыдущую страницу ведёт назад по ленте."
+
+
+def test_legacy_page_param_still_works(
+        user_client, many_posts_with_published_locations
+):
+    response = user_client.get("/?page=2")
+    assert response.status_code == 200
+    assert response.context["page_obj"].number == 2, (
+        "Убедитесь, что старые ссылки вида `?page=N` продолжают работать."
+    )
+
+
+def test_invalid_cursor_returns_404(user_client):
+    assert user_client.get("/?after=broken").status_code == 404
+
+
+def _count_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    return sum("COUNT(" in query["sql"] for query in ctx.captured_queries)
+
+
+def test_page_count_is_cached(
+        user_client, many_posts_with_published_locations
+):
+    cache.clear()
+    assert _count_queries(user_client, "/?page=2") == 1
+    assert _count_queries(user_client, "/?page=1") == 0, (
+        "Убедитесь, что общее число публикаций кешируется между запросами."
+    )
+
+    post = many_posts_with_published_locations[0]
+    post.is_published = False
+    post.save()
+    assert _count_queries(user_client, "/?page=2") == 1, (
+        "Убедитесь, что кеш числа публикаций сбрасывается при снятии"
+        " публикации."
+    )
+
+
+@override_settings(POST_COUNT_ESTIMATE_THRESHOLD=N_PER_PAGE // 2)
+def test_estimated_count_keeps_deep_pages(
+        user_client, many_posts_with_published_locations
+):
+    cache.clear()
+    response = user_client.get("/?page=2")
+    assert response.status_code == 200
+    assert response.context["paginator"].is_estimated
+    assert len(response.context["page_obj"]) == N_PER_PAGE
+    assert user_client.get("/?page=3").status_code == 404
@@ -0,0 +1,208 @@
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from blog.constants import MAX_DISPLAY_COMMENTS
+from blog.forms import PostForm
+from blog.lookups import TABLES
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def warm_lookups(post_with_published_location):
+    for table in TABLES.values():
+        table.load()
+
+
+def test_category_lookup_runs_once(
+        client, django_assert_num_queries, post_with_published_location,
+        warm_lookups
+):
+    slug = post_with_published_location.category.slug
+    # Категория берётся из кеша процесса; публикации и ближайшая отложенная
+    # публикация для срока кеша.
+    with django_assert_num_queries(2):
+        response = client.get(f"/category/{slug}/")
+    assert response.status_code == 200
+
+
+def test_profile_lookup_runs_once(
+        user_client, user, django_assert_num_queries,
+        post_with_published_location, warm_lookups
+):
+    # Пользователь запроса, профиль и публикации; сессия берётся из кеша.
+    with django_assert_num_queries(3):
+        response = user_client.get(f"/profile/{user.username}/")
+    assert response.status_code == 200
+
+
+def test_comment_edit_loads_comment_once(
+        django_assert_num_queries, comment_to_a_post
+):
+    client = Client()
+    client.force_login(comment_to_a_post.author)
+    url = (
+        f"/posts/{comment_to_a_post.post_id}/comment/"
+        f"edit_comment/{comment_to_a_post.id}"
+    )
+    # Пользователь запроса и комментарий; сессия берётся из кеша.
+    with django_assert_num_queries(2):
+        response = client.get(url)
+    assert response.status_code == 200
+
+
+def test_post_detail_comment_authors_in_one_query(
+        mixer, client, django_assert_max_num_queries,
+        post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    with CaptureQueriesContext(connection) as captured:
+        client.get(f"/posts/{post.id}/")
+    mixer.cycle(20).blend("blog.Comment", post=post)
+    with django_assert_max_num_queries(len(captured)):
+        response = client.get(f"/posts/{post.id}/")
+    assert response.status_code == 200
+
+
+def test_comments_load_more(
+        mixer, client, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(MAX_DISPLAY_COMMENTS + 5).blend(
+        "blog.Comment", post=post
+    )
+    response = client.get(f"/posts/{post.id}/")
+    first_page = list(response.context["comments"])
+    assert len(first_page) == MAX_DISPLAY_COMMENTS
+    cursor = response.context["comments"].next_cursor
+    assert cursor, (
+        "Убедитесь, что на странице поста есть ссылка «Показать ещё»."
+    )
+
+    more = client.get(f"/posts/{post.id}/comments/?after={cursor}")
+    assert more.status_code == 200
+    assert [c.id for c in first_page + list(more.context["comments"])] == [
+        c.id for c in comments
+    ]
+    assert not more.context["comments"].has_next()
+
+
+@pytest.mark.parametrize(
+    "client_fixture, expected_queries",
+    (
+        ("unlogged_client", 2),
+        ("another_user_client", 3),
+        ("user_client", 3),
+    ),
+)
+def test_post_detail_query_budget(
+        request, client_fixture, expected_queries,
+        django_assert_num_queries, post_with_published_location,
+        warm_lookups
+):
+    post_client = request.getfixturevalue(client_fixture)
+    # Публикация с автором и комментарии; для авторизованных
+    # пользователей ещё пользователь запроса, пока его нет в кеше.
+    with django_assert_num_queries(expected_queries):
+        response = post_client.get(
+            f"/posts/{post_with_published_location.id}/"
+        )
+    assert response.status_code == 200
+
+
+def test_unpublished_post_visible_to_author_only(
+        user_client, another_user_client, post_with_published_location
+):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    assert user_client.get(f"/posts/{post.id}/").status_code == 200
+    assert another_user_client.get(f"/posts/{post.id}/").status_code == 404
+
+
+def test_post_edit_and_delete_load_post_once(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    for url in (f"/posts/{post.id}/edit/", f"/posts/{post.id}/delete/"):
+        with CaptureQueriesContext(connection) as ctx:
+            response = user_client.post(url)
+        assert response.status_code in (200, 302)
+        post_selects = [
+            query for query in ctx.captured_queries
+            if query["sql"].startswith('SELECT "blog_post"')
+        ]
+        assert len(post_selects) == 1, (
+            "Убедитесь, что при редактировании и удалении публикация"
+            " загружается из базы данных один раз."
+        )
+    assert not type(post).objects.filter(pk=post.pk).exists()
+
+
+def test_post_edit_builds_one_form(
+        user_client, monkeypatch, post_with_published_location
+):
+    built = []
+    init = PostForm.__init__
+
+    def counting_init(self, *args, **kwargs):
+        built.append(self)
+        init(self, *args, **kwargs)
+
+    monkeypatch.setattr(PostForm, "__init__", counting_init)
+    response = user_client.get(
+        f"/posts/{post_with_published_location.id}/edit/"
+    )
+    assert response.status_code == 200
+    assert len(built) == 1, (
+        "Убедитесь, что страница редактирования не создаёт лишнюю форму."
+    )
+
+
+def test_list_pages_skip_post_text(
+        client, mixer, user, published_category
+):
+    words = [f"слово{i}" for i in range(50)]
+    post = mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        text=" ".join(words),
+    )
+    assert post.excerpt == " ".join(words[:10]) + " …"
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get("/")
+    assert post.excerpt in response.content.decode("utf-8")
+    assert not any(
+        '"blog_post"."text"' in query["sql"]
+        for query in ctx.captured_queries
+    ), "Убедитесь, что списки публикаций не загружают полный текст постов."
+
+
+def test_excerpt_kept_when_text_not_saved(mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category, text="Текст"
+    )
+    excerpt = post.excerpt
+    post = type(post).objects.defer("text").get(pk=post.pk)
+    post.title = "Новый заголовок"
+    with CaptureQueriesContext(connection) as ctx:
+        post.save()
+    assert not any(
+        '"blog_post"."text"' in query["sql"]
+        for query in ctx.captured_queries
+    ), "Убедитесь, что сохранение не загружает отложенный текст поста."
+    post.refresh_from_db()
+    assert post.excerpt == excerpt, (
+        "Убедитесь, что при сохранении без загруженного текста выдержка"
+        " не пересчитывается."
+    )
+
+    post.text = "Другой текст"
+    post.save(update_fields=["title"])
+    post.refresh_from_db()
+    assert post.excerpt == excerpt
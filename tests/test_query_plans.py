@@ -0,0 +1,67 @@
+import pytest
+from django.db.models import Q
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _assert_index_scan(queryset, err_msg):
+    plan = queryset.explain()
+    assert "SCAN blog_post" not in plan, f"{err_msg}\n{plan}"
+    assert "TEMP B-TREE" not in plan, f"{err_msg}\n{plan}"
+
+
+def test_feed_queries_use_indexes(user, published_category):
+    post = Post.objects.create(
+        title="Заголовок",
+        text="Текст",
+        pub_date=timezone.now(),
+        author=user,
+        category=published_category,
+    )
+    for queryset, err_msg in (
+        (
+            Post.objects.publish_filter().annotate_select_comments(),
+            "Запрос ленты публикаций должен использовать индекс.",
+        ),
+        (
+            Post.objects.publish_filter().annotate_select_comments().filter(
+                pub_date__lte=post.pub_date
+            ).filter(Q(pub_date__lt=post.pub_date) | Q(pk__lt=post.pk)),
+            "Запрос следующей страницы ленты должен использовать индекс.",
+        ),
+        (
+            published_category.posts.publish_filter()
+            .annotate_select_comments(),
+            "Запрос публикаций категории должен использовать индекс.",
+        ),
+        (
+            user.posts.publish_filter().annotate_select_comments(),
+            "Запрос публикаций автора должен использовать индекс.",
+        ),
+        (
+            user.posts.annotate_select_comments(),
+            "Запрос собственных публикаций автора должен использовать индекс.",
+        ),
+    ):
+        _assert_index_scan(queryset[:11], err_msg)
+
+
+def test_publish_filter_keeps_posts_of_today(user, published_category):
+    later_today = timezone.localtime().replace(hour=23, minute=59)
+    tomorrow = later_today + timezone.timedelta(minutes=1)
+    for pub_date in (later_today, tomorrow):
+        Post.objects.create(
+            title="Заголовок",
+            text="Текст",
+            pub_date=pub_date,
+            author=user,
+            category=published_category,
+        )
+    assert [
+        post.pub_date for post in Post.objects.publish_filter()
+    ] == [later_today], (
+        "Убедитесь, что публикации с датой сегодня видны, а завтрашние — нет."
+    )
@@ -0,0 +1,69 @@
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.scheduling import cap_timeout, goes_live_at
+
+pytestmark = [pytest.mark.django_db]
+
+DAY = timezone.timedelta(days=1)
+
+
+@pytest.fixture
+def scheduled_post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        pub_date=timezone.now() + 3 * DAY,
+    )
+
+
+def test_cache_timeout_stops_at_scheduled_post(
+        scheduled_post, another_user
+):
+    remaining = (
+        goes_live_at(scheduled_post.pub_date) - timezone.now()
+    ).total_seconds()
+    timeout = 10 * 24 * 60 * 60
+    tags = ("global", f"category:{scheduled_post.category.slug}")
+    capped = cap_timeout(
+        timeout, tags, category__slug=scheduled_post.category.slug
+    )
+    assert 0 < capped <= remaining + 1, (
+        "Убедитесь, что кеш списка не переживает момент появления"
+        " отложенной публикации."
+    )
+    assert cap_timeout(
+        timeout,
+        ("global", f"profile:{another_user.username}"),
+        author__username=another_user.username,
+    ) == timeout, (
+        "Убедитесь, что отложенная публикация не сокращает срок кеширования"
+        " чужих списков."
+    )
+
+
+def test_publish_scheduled_refreshes_cached_pages(
+        client, monkeypatch, scheduled_post
+):
+    urls = (
+        "/",
+        f"/category/{scheduled_post.category.slug}/",
+        f"/profile/{scheduled_post.author.username}/",
+    )
+    call_command("publish_scheduled")
+    for url in urls:
+        assert scheduled_post.title not in (
+            client.get(url).content.decode("utf-8")
+        )
+
+    later = timezone.now() + 4 * DAY
+    monkeypatch.setattr(timezone, "now", lambda: later)
+    call_command("publish_scheduled")
+    for url in urls:
+        content = client.get(url).content.decode("utf-8")
+        assert scheduled_post.title in content, (
+            "Убедитесь, что после наступления даты публикации кеш страниц"
+            " сбрасывается и запись появляется в ленте."
+        )
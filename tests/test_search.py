@@ -0,0 +1,117 @@
+import re
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def searchable_post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        title="Поход в горы",
+        text="Маршрут вдоль реки <b>Катунь</b> занял три дня.",
+    )
+
+
+def test_search_finds_and_highlights(client, searchable_post):
+    response = client.get("/search/", {"q": "катунь"})
+    assert response.status_code == 200
+    assert list(response.context["page_obj"]) == [searchable_post]
+    content = response.content.decode("utf-8")
+    assert "<mark>Катунь</mark>" in content, (
+        "Убедитесь, что найденные слова выделяются в результатах поиска."
+    )
+    assert "<b>" not in content, (
+        "Убедитесь, что текст публикации экранируется в результатах поиска."
+    )
+
+
+def test_search_index_follows_post_changes(client, searchable_post):
+    searchable_post.text = "Сплав по Чуе"
+    searchable_post.save()
+    assert not client.get("/search/", {"q": "Катунь"}).context["page_obj"]
+    assert client.get("/search/", {"q": "Чуе"}).context["page_obj"]
+
+    searchable_post.is_published = False
+    searchable_post.save()
+    assert not client.get("/search/", {"q": "Чуе"}).context["page_obj"], (
+        "Убедитесь, что в поиске не показываются снятые с публикации посты."
+    )
+
+    searchable_post.delete()
+    call_command("rebuild_search_index")
+    assert not Post.objects.search("Чуе").exists()
+
+
+def test_search_cursor_pagination(client, mixer, user, published_category):
+    posts = mixer.cycle(15).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        title="Заметка о байдарках",
+    )
+    found = []
+    url = "/search/?q=байдарках"
+    while url:
+        response = client.get(url)
+        found.extend(response.context["page_obj"])
+        match = re.search(
+            r'\?q=[^"]+&amp;after=([\w-]+)', response.content.decode("utf-8")
+        )
+        url = f"/search/?q=байдарках&after={match.group(1)}" if match else None
+    assert sorted(post.id for post in found) == sorted(
+        post.id for post in posts
+    )
+
+
+def test_search_handles_fts_syntax(client, searchable_post):
+    response = client.get("/search/", {"q": 'горы" OR NEAR('})
+    assert response.status_code == 200
+    assert not client.get("/search/").context["page_obj"]
+
+
+def test_frequent_words_ranked_among_newest_matches(
+        client, monkeypatch, mixer, user, published_category
+):
+    monkeypatch.setattr("blog.models.SEARCH_RANK_WINDOW", 2)
+    monkeypatch.setattr("blog.views.PostSearchView.paginate_by", 2)
+    texts = ("Горы горы горы горы", "Реки", "Реки", "Горы горы горы", "Реки")
+    posts = [
+        mixer.blend(
+            "blog.Post",
+            author=user,
+            category=published_category,
+            title="Горы",
+            text=text,
+        )
+        for text in texts
+    ]
+    mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=False,
+        title="Горы",
+        text="Горы",
+    )
+    found = []
+    url = "/search/?q=горы"
+    while url:
+        response = client.get(url)
+        found.extend(post.pk for post in response.context["page_obj"])
+        match = re.search(
+            r'\?q=[^"]+&amp;after=([\w-]+)', response.content.decode("utf-8")
+        )
+        url = f"/search/?q=горы&after={match.group(1)}" if match else None
+    assert found == [
+        posts[3].pk, posts[4].pk, posts[2].pk, posts[1].pk, posts[0].pk
+    ], (
+        "Убедитесь, что по релевантности упорядочиваются только новые "
+        "видимые совпадения, а остальные доступны дальше от новых к старым."
+    )
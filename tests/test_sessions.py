@@ -0,0 +1,119 @@
+import time
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from blog.sessions import SessionStore
+
+pytestmark = [pytest.mark.django_db]
+
+PASSWORD = "Very-secret-42"
+
+
+def _auth_queries(ctx):
+    return [
+        query["sql"] for query in ctx.captured_queries
+        if "django_session" in query["sql"]
+        or 'WHERE "auth_user"."id" =' in query["sql"]
+    ]
+
+
+def test_session_and_user_come_from_cache(user_client):
+    user_client.get("/")
+    with CaptureQueriesContext(connection) as ctx:
+        for _ in range(3):
+            response = user_client.get("/")
+    assert response.context["user"].is_authenticated
+    assert not _auth_queries(ctx), (
+        "Убедитесь, что сессия и пользователь запроса берутся из кеша,"
+        " а продление сессии не пишется в базу на каждом запросе."
+    )
+
+
+def test_sessions_survive_page_cache_clear(user_client):
+    user_client.get("/")
+    caches["default"].clear()
+    with CaptureQueriesContext(connection) as ctx:
+        response = user_client.get("/")
+    assert response.context["user"].is_authenticated
+    assert not _auth_queries(ctx), (
+        "Убедитесь, что сессии хранятся отдельно от кеша страниц."
+    )
+
+
+def test_session_expiry_refreshed_after_half_age(user_client, monkeypatch):
+    user_client.get("/")
+    sessions = caches[settings.SESSION_CACHE_ALIAS]
+    writes = []
+    cache_set = sessions.set
+
+    def record_set(key, *args, **kwargs):
+        writes.append(key)
+        return cache_set(key, *args, **kwargs)
+
+    monkeypatch.setattr(sessions, "set", record_set)
+    for _ in range(3):
+        user_client.get("/")
+    assert not writes, (
+        "Убедитесь, что продление неизменной сессии не пишется в кеш"
+        " на каждом запросе."
+    )
+
+    store = SessionStore(user_client.cookies["sessionid"].value)
+    cache_set(
+        store.get_refreshed_key(store.session_key),
+        time.time() - settings.SESSION_COOKIE_AGE / 2,
+        None
+    )
+    user_client.get("/")
+    assert store.cache_key in writes, (
+        "Убедитесь, что срок сессии продлевается, когда прошла половина"
+        " срока её жизни."
+    )
+
+
+def test_profile_update_refreshes_cached_user(user_client, user):
+    user_client.get("/")
+    user_client.post("/profile/edit/", data={
+        "first_name": "Новое",
+        "last_name": "Имя",
+        "username": "renamed_user",
+        "email": "renamed@example.com",
+    })
+    assert user_client.get("/").context["user"].username == "renamed_user", (
+        "Убедитесь, что после редактирования профиля пользователь запроса"
+        " не берётся из устаревшего кеша."
+    )
+
+
+def test_password_change_and_logout_end_cached_sessions(user):
+    user.set_password(PASSWORD)
+    user.save()
+    other_device, this_device = Client(), Client()
+    for client in (other_device, this_device):
+        assert client.login(username=user.username, password=PASSWORD)
+        assert client.get("/").context["user"].is_authenticated
+
+    new_password = PASSWORD + "-new"
+    this_device.post("/auth/password_change/", data={
+        "old_password": PASSWORD,
+        "new_password1": new_password,
+        "new_password2": new_password,
+    })
+    assert this_device.get("/").context["user"].is_authenticated
+    assert not other_device.get("/").context["user"].is_authenticated, (
+        "Убедитесь, что после смены пароля другие сессии пользователя"
+        " завершаются."
+    )
+
+    cookie = this_device.cookies["sessionid"].value
+    this_device.post("/auth/logout/")
+    stale_client = Client()
+    stale_client.cookies["sessionid"] = cookie
+    assert not stale_client.get("/").context["user"].is_authenticated, (
+        "Убедитесь, что после выхода сессия удаляется и из кеша."
+    )
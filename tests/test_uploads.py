@@ -0,0 +1,217 @@
+import json
+import os
+import struct
+import subprocess
+import sys
+import zlib
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+from blog.forms import UploadImageField
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures("media_root"),
+]
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / "blogicum"
+GPS_IFD = 0x8825
+
+# Пиковая память процесса (VmHWM) при проверке загрузки. Запускается
+# отдельным процессом, чтобы не учитывать память самих тестов.
+RSS_SCRIPT = """
+import json, re, sys
+import django
+django.setup()
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+from blog.forms import UploadImageField
+
+def peak():
+    with open('/proc/self/status') as status:
+        return int(re.search(r'VmHWM:\\s+(\\d+)', status.read())[1])
+
+def clean(path):
+    with open(path, 'rb') as file:
+        upload = SimpleUploadedFile(path, file.read())
+    try:
+        return UploadImageField().clean(upload).size
+    except ValidationError as error:
+        return error.messages
+
+with override_settings(IMAGE_STORED_MAX_SIDE=1000):
+    clean(sys.argv[1])
+    before = peak()
+    result = clean(sys.argv[2])
+    after = peak()
+    full = after
+    if isinstance(result, int):
+        # Для сравнения: то же изображение, декодированное целиком.
+        Image.open(sys.argv[2]).load()
+        full = peak()
+print(json.dumps({
+    'result': result, 'peak_kb': after - before, 'full_kb': full - after,
+}))
+"""
+
+
+def png_chunk(kind, data):
+    return (
+        struct.pack(">I", len(data)) + kind + data
+        + struct.pack(">I", zlib.crc32(kind + data))
+    )
+
+
+def png_bomb(side):
+    """Чёрно-белый PNG side x side, который весит десятки килобайт."""
+    compressor = zlib.compressobj(9)
+    row = bytes(1 + (side + 7) // 8)
+    data = b"".join(compressor.compress(row) for _ in range(side))
+    data += compressor.flush()
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + png_chunk(b"IHDR", struct.pack(">II5B", side, side, 1, 0, 0, 0, 0))
+        + png_chunk(b"IDAT", data)
+        + png_chunk(b"IEND", b"")
+    )
+
+
+def image_bytes(size, fmt="JPEG", **options):
+    buffer = BytesIO()
+    Image.linear_gradient("L").convert("RGB").resize(size).save(
+        buffer, fmt, **options
+    )
+    return buffer.getvalue()
+
+
+def jpeg_with_size(width, height):
+    """Маленький JPEG, в заголовке которого записаны другие размеры."""
+    data = bytearray(image_bytes((16, 16)))
+    sof = data.index(b"\xff\xc0")
+    data[sof + 5:sof + 9] = struct.pack(">HH", height, width)
+    return bytes(data)
+
+
+def clean(data, name="image.jpg"):
+    return UploadImageField().clean(SimpleUploadedFile(name, data))
+
+
+@pytest.mark.parametrize("data, name", [
+    (png_bomb(30000), "bomb.png"),
+    (jpeg_with_size(60000, 60000), "bomb.jpg"),
+    (jpeg_with_size(9000, 9000), "large.jpg"),
+    (jpeg_with_size(13000, 100), "wide.jpg"),
+])
+def test_oversized_image_rejected(data, name):
+    with pytest.raises(ValidationError) as error:
+        clean(data, name)
+    assert error.value.code == "image_too_large", (
+        "Убедитесь, что изображения сверх лимита пикселей отклоняются "
+        "по заголовку, без декодирования."
+    )
+
+
+def test_not_an_image_rejected():
+    with pytest.raises(ValidationError) as error:
+        clean(b"not an image at all", "image.jpg")
+    assert error.value.code == "invalid_image"
+
+
+def test_byte_limit_while_streaming(settings, user_client, published_category):
+    settings.IMAGE_UPLOAD_MAX_BYTES = 1024
+    response = user_client.post(reverse("blog:create_post"), {
+        "title": "Заголовок",
+        "text": "Текст",
+        "pub_date": "2020-01-01 10:00",
+        "category": published_category.pk,
+        "image": SimpleUploadedFile("image.jpg", image_bytes((300, 300))),
+    })
+    assert response.status_code == 200
+    errors = response.context["form"].errors["image"]
+    assert any("Файл больше" in error for error in errors), (
+        "Убедитесь, что файл больше IMAGE_UPLOAD_MAX_BYTES отклоняется."
+    )
+
+
+def test_jpeg_metadata_stripped_without_reencoding():
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x010F] = "Camera"
+    exif.get_ifd(GPS_IFD)[2] = (55.0, 45.0, 0.0)
+    data = image_bytes((120, 80), exif=exif, comment=b"secret")
+    cleaned = clean(data)
+    result = cleaned.read()
+    assert len(result) < len(data)
+    image = Image.open(BytesIO(result))
+    assert dict(image.getexif()) == {0x0112: 6}, (
+        "Убедитесь, что из EXIF удаляется всё, кроме поворота снимка."
+    )
+    assert b"secret" not in result
+    assert image.tobytes() == Image.open(BytesIO(data)).tobytes(), (
+        "Убедитесь, что JPEG очищается без перекодирования."
+    )
+    assert cleaned.content_type == "image/jpeg"
+
+
+def test_png_text_chunks_stripped():
+    image = Image.new("RGB", (40, 40), "red")
+    buffer = BytesIO()
+    info = PngInfo()
+    info.add_text("Author", "secret")
+    image.save(buffer, "PNG", pnginfo=info)
+    result = clean(buffer.getvalue(), "image.png").read()
+    assert b"secret" not in result
+    assert Image.open(BytesIO(result)).tobytes() == image.tobytes()
+
+
+def test_large_image_downscaled(settings):
+    settings.IMAGE_STORED_MAX_SIDE = 100
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    cleaned = clean(image_bytes((400, 200), exif=exif))
+    image = Image.open(cleaned)
+    assert image.size == (50, 100), (
+        "Убедитесь, что большие изображения уменьшаются с учётом поворота."
+    )
+    assert not image.getexif()
+
+
+@pytest.mark.skipif(
+    not os.path.exists("/proc/self/status"), reason="Нужен procfs."
+)
+def test_peak_memory_bounded(tmp_path):
+    small = tmp_path / "small.jpg"
+    small.write_bytes(image_bytes((2000, 10)))
+    bomb = tmp_path / "bomb.png"
+    bomb.write_bytes(png_bomb(30000))
+    large = tmp_path / "large.jpg"
+    Image.new("RGB", (6000, 6000), "gray").save(large, quality=80)
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": "blogicum.settings"}
+
+    def measure(path):
+        output = subprocess.run(
+            [sys.executable, "-c", RSS_SCRIPT, str(small), str(path)],
+            cwd=PROJECT_DIR, env=env, capture_output=True, check=True,
+        ).stdout
+        return json.loads(output)
+
+    bomb_run = measure(bomb)
+    assert isinstance(bomb_run["result"], list)
+    assert bomb_run["peak_kb"] < 8 * 1024, (
+        "Убедитесь, что изображение-бомба отклоняется без декодирования."
+    )
+    large_run = measure(large)
+    assert isinstance(large_run["result"], int)
+    assert large_run["full_kb"] > 80 * 1024
+    assert large_run["peak_kb"] < 30 * 1024, (
+        "Убедитесь, что большие JPEG уменьшаются при декодировании."
+    )
@@ -0,0 +1,44 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+from blog.management.commands.warm_cache import Command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_warm_cache_fills_page_cache(
+        client, capsys, django_assert_num_queries,
+        many_posts_with_published_locations
+):
+    post = many_posts_with_published_locations[0]
+    call_command(
+        "warm_cache", "--pages", "2", "--workers", "1", "--verbosity", "2"
+    )
+    out = capsys.readouterr().out
+    assert "с ошибкой: 0" in out
+    urls = [
+        line.split()[2] for line in out.splitlines() if line.startswith("[")
+    ]
+    assert any("?after=" in url for url in urls), (
+        "Убедитесь, что прогреваются следующие страницы ленты."
+    )
+    assert f"/category/{post.category.slug}/" in urls
+    assert f"/profile/{post.author.username}/" in urls
+    for url in urls:
+        with django_assert_num_queries(0):
+            assert client.get(url).status_code == 200, (
+                "Убедитесь, что прогретые страницы отдаются из кеша."
+            )
+
+
+def test_warm_cache_fails_on_error_pages(
+        capsys, monkeypatch, post_with_published_location
+):
+    monkeypatch.setattr(
+        Command, "collect_urls", lambda self, options: ["/profile/nobody/"]
+    )
+    with pytest.raises(CommandError, match="с ошибкой: 1"):
+        call_command("warm_cache", "--workers", "1", "--host", "127.0.0.1")
+    assert "404 /profile/nobody/" in capsys.readouterr().out, (
+        "Убедитесь, что прогрев сообщает о страницах с ошибкой."
+    )